@@ -1,4 +1,20 @@
 from .core import AudioVisualOverlay
+from .effects import (
+    LogoOverlayEffect,
+    TextOverlayEffect,
+    SpectrumVisualizerEffect,
+    create_effect,
+    effect_from_dict,
+    register_effect,
+)
 
 __version__ = "0.1.0"
-__all__ = ['AudioVisualOverlay']
\ No newline at end of file
+__all__ = [
+    'AudioVisualOverlay',
+    'LogoOverlayEffect',
+    'TextOverlayEffect',
+    'SpectrumVisualizerEffect',
+    'create_effect',
+    'effect_from_dict',
+    'register_effect',
+]
\ No newline at end of file
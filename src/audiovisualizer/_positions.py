@@ -0,0 +1,45 @@
+"""Shared named-position tables for overlay and drawtext filters.
+
+Kept in their own module so every effect resolves against the same
+frozen tables instead of reaching through another effect class.
+"""
+
+from types import MappingProxyType
+
+# Named positions as FFmpeg overlay expressions, frozen so lookups stay
+# a pure C dict hit and the table can't be mutated per instance
+NAMED_POSITIONS = MappingProxyType({
+    'top-left': ('10', '10'),
+    'top-center': ('(main_w-overlay_w)/2', '10'),
+    'top-right': ('main_w-overlay_w-10', '10'),
+    'center': ('(main_w-overlay_w)/2', '(main_h-overlay_h)/2'),
+    'bottom-left': ('10', 'main_h-overlay_h-10'),
+    'bottom-center': ('(main_w-overlay_w)/2', 'main_h-overlay_h-10'),
+    'bottom-right': ('main_w-overlay_w-10', 'main_h-overlay_h-10'),
+})
+
+# The drawtext filter uses its own expression variables
+TEXT_POSITIONS = MappingProxyType({
+    'top-left': ('10', '10'),
+    'top-center': ('(w-text_w)/2', '10'),
+    'top-right': ('w-text_w-10', '10'),
+    'center': ('(w-text_w)/2', '(h-text_h)/2'),
+    'bottom-left': ('10', 'h-text_h-10'),
+    'bottom-center': ('(w-text_w)/2', 'h-text_h-10'),
+    'bottom-right': ('w-text_w-10', 'h-text_h-10'),
+})
+
+
+def resolve_position(position, table=NAMED_POSITIONS):
+    """Resolve a named position to its (x, y) expression tuple
+
+    Args:
+        position: Named position string or an (x, y) tuple
+        table: Position table to resolve names against
+
+    Returns:
+        (x, y) expression tuple; unknown values pass through unchanged
+    """
+    if isinstance(position, str):
+        return table.get(position, position)
+    return position
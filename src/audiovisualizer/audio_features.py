@@ -16,43 +16,119 @@ class AudioFeatureExtractor:
         # Extract audio from the video clip
         temp_audio_path = "temp_audio.wav"
         video_clip.audio.write_audiofile(temp_audio_path, fps=44100, logger=None)
-        
+
         try:
             # Load the audio file with librosa
             y, sr = librosa.load(temp_audio_path)
-            
+
+            num_frames = int(video_clip.fps * video_clip.duration)
+            return self.extract_from_array(
+                y, sr, n_mfcc=n_mfcc, hop_length=hop_length, num_frames=num_frames
+            )
+        except Exception as e:
+            logger.error(f"Error extracting audio features: {e}")
+            self.features = None
+            return None
+        finally:
+            # Clean up the temporary audio file
+            if os.path.exists(temp_audio_path):
+                os.remove(temp_audio_path)
+
+    def extract_from_array(self, y, sr, n_mfcc=13, hop_length=512, num_frames=None):
+        """Extract audio features from an already-decoded audio array.
+
+        Args:
+            y: Audio samples as a 1D float array (stereo is averaged down)
+            sr: Sample rate of the audio
+            n_mfcc: Number of MFCC coefficients to extract
+            hop_length: Hop length for feature extraction
+            num_frames: Video frame count to resize features to
+        """
+        try:
+            y = np.asarray(y, dtype=np.float32)
+            if y.ndim > 1:
+                y = y.mean(axis=1)
+
+            # The spectrogram-derived features dominate extraction time;
+            # compute them on GPU when torchaudio + CUDA are available
+            gpu_features = self._extract_features_gpu(y, sr, n_mfcc, hop_length)
+
             # Extract various audio features
             self.features = {
                 'duration': librosa.get_duration(y=y, sr=sr),
                 'tempo': librosa.beat.tempo(y=y, sr=sr)[0],
-                'rms': librosa.feature.rms(y=y, hop_length=hop_length)[0],
                 'onsets': librosa.onset.onset_strength(y=y, sr=sr),
-                'mfcc': librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc),
-                'spectral_centroid': librosa.feature.spectral_centroid(y=y, sr=sr)[0],
             }
-            
+            if gpu_features is not None:
+                self.features.update(gpu_features)
+            else:
+                self.features.update({
+                    'rms': librosa.feature.rms(y=y, hop_length=hop_length)[0],
+                    'mfcc': librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc),
+                    'spectral_centroid': librosa.feature.spectral_centroid(y=y, sr=sr)[0],
+                })
+
             # Normalize and resize the features to match video frame count
-            self._normalize_features(video_clip)
-            
+            self._normalize_features(num_frames)
+
             logger.info("Audio features extracted successfully")
             return self.features
-            
+
         except Exception as e:
             logger.error(f"Error extracting audio features: {e}")
             self.features = None
             return None
-        finally:
-            # Clean up the temporary audio file
-            if os.path.exists(temp_audio_path):
-                os.remove(temp_audio_path)
-    
-    def _normalize_features(self, video_clip):
+
+    def _extract_features_gpu(self, y, sr, n_mfcc, hop_length, n_fft=2048):
+        """Compute spectrogram-based features on GPU via torchaudio.
+
+        Returns a dict with 'rms', 'mfcc' and 'spectral_centroid', or
+        None when torch/torchaudio are not installed or no CUDA device
+        is available (callers fall back to librosa on CPU).
+        """
+        try:
+            import torch
+            import torchaudio
+        except ImportError:
+            return None
+
+        if not torch.cuda.is_available():
+            return None
+
+        try:
+            wav = torch.from_numpy(np.ascontiguousarray(y)).cuda().unsqueeze(0)
+
+            mfcc_transform = torchaudio.transforms.MFCC(
+                sample_rate=sr,
+                n_mfcc=n_mfcc,
+                melkwargs={'n_fft': n_fft, 'hop_length': hop_length},
+            ).cuda()
+            mfcc = mfcc_transform(wav)[0]
+
+            frames = torch.nn.functional.pad(
+                wav, (n_fft // 2, n_fft // 2)
+            ).unfold(1, n_fft, hop_length)
+            rms = frames.pow(2).mean(dim=-1).sqrt()[0]
+
+            centroid = torchaudio.functional.spectral_centroid(
+                wav, sr, 0, torch.hann_window(n_fft, device=wav.device),
+                n_fft, hop_length, n_fft,
+            )[0]
+
+            return {
+                'rms': rms.cpu().numpy(),
+                'mfcc': mfcc.cpu().numpy(),
+                'spectral_centroid': centroid.cpu().numpy(),
+            }
+        except Exception as e:
+            logger.warning(f"GPU feature extraction failed, using librosa: {e}")
+            return None
+
+    def _normalize_features(self, num_frames):
         """Normalize and resize features to match the video frame count."""
-        if not self.features:
+        if not self.features or not num_frames:
             return
-            
-        num_frames = int(video_clip.fps * video_clip.duration)
-        
+
         for feature in ['rms', 'onsets', 'spectral_centroid']:
             # Resize to match frame count
             self.features[feature] = np.interp(
@@ -1,7 +1,9 @@
 import os
 import logging
+from collections import OrderedDict
+import numpy as np
 from moviepy.video.io.VideoFileClip import VideoFileClip
-from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
+from moviepy.video.VideoClip import VideoClip
 from typing import Dict, List, Tuple, Union, Optional, Any
 
 from .audio_features import AudioFeatureExtractor
@@ -10,11 +12,67 @@ from .export import VideoExporter
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import guvectorize
+
+    @guvectorize(
+        ["void(uint8[:,:,:], uint8[:,:,:], uint8[:,:], uint8[:,:,:])"],
+        "(h,w,c),(h,w,c),(h,w)->(h,w,c)",
+        target="parallel", nopython=True,
+    )
+    def _blend_rgba_kernel(dst, src, alpha, out):
+        """SIMD-friendly integer alpha blend over the overlay rect"""
+        h, w, c = dst.shape
+        for i in range(h):
+            for j in range(w):
+                a = np.uint32(alpha[i, j])
+                inv = np.uint32(255) - a
+                for k in range(c):
+                    out[i, j, k] = np.uint8(
+                        (np.uint32(src[i, j, k]) * a
+                         + np.uint32(dst[i, j, k]) * inv + 127) // 255
+                    )
+
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+
+def _blend_rgba(dst, src, alpha):
+    """Alpha-blend an overlay rect over a base rect
+
+    Dispatches to a vectorized Numba kernel when numba is installed so
+    LLVM can emit unrolled SIMD loops over the uint8 data; falls back to
+    a NumPy float blend otherwise.
+
+    Args:
+        dst: Base rect (h, w, 3) uint8
+        src: Overlay rect (h, w, 3) uint8
+        alpha: Overlay alpha mask (h, w) float in [0, 1]
+
+    Returns:
+        Blended rect (h, w, 3) uint8
+    """
+    if _NUMBA_AVAILABLE and dst.dtype == np.uint8 and src.dtype == np.uint8:
+        alpha_u8 = (np.clip(alpha, 0.0, 1.0) * 255.0).astype(np.uint8)
+        return _blend_rgba_kernel(
+            np.ascontiguousarray(dst),
+            np.ascontiguousarray(src),
+            alpha_u8,
+        )
+    a = alpha[..., np.newaxis]
+    blended = src.astype(np.float32) * a + dst.astype(np.float32) * (1.0 - a)
+    return blended.astype(np.uint8)
+
 class AudioVisualOverlay:
     """
     Main class for creating audio-visual overlays with reactive elements.
     Acts as a facade to the various specialized components.
     """
+
+    # Maximum number of composited frames kept by the make_frame LRU
+    _FRAME_CACHE_SIZE = 64
+
     def __init__(self, video_path=None):
         """
         Initialize the audio visual overlay processor
@@ -23,13 +81,21 @@ class AudioVisualOverlay:
             video_path: Optional path to video file to load immediately
         """
         self.video = None
+        self._original_video = None
         self.element_manager = ElementManager()
         self.audio_feature_extractor = AudioFeatureExtractor()
         self.exporter = VideoExporter()
         
         if video_path:
             self.load_video(video_path)
-        
+
+    def __del__(self):
+        # Flush any persistent encoder the exporter may still hold
+        try:
+            self.exporter.close()
+        except Exception:
+            pass
+
     def load_video(self, video_path):
         """Load a video file for processing
         
@@ -40,11 +106,14 @@ class AudioVisualOverlay:
             self: For method chaining
         """
         self.video = VideoFileClip(video_path)
-        
+        # Keep the pristine source so repeated process() calls composite
+        # against it instead of stacking composites
+        self._original_video = self.video
+
         # Initialize managers with the base video
         self.element_manager.set_base_video(self.video)
         self.exporter.set_video(self.video)
-        
+
         return self
     
     def extract_audio_features(self, n_mfcc=13, hop_length=512):
@@ -60,13 +129,35 @@ class AudioVisualOverlay:
         if not self.video:
             logger.error("No video loaded.")
             return self
-            
-        self.audio_feature_extractor.extract_from_video(
-            self.video, 
-            n_mfcc=n_mfcc, 
-            hop_length=hop_length
-        )
-        
+
+        # Try to decode the audio directly with soundfile, which is much
+        # faster than routing through MoviePy/audioread; fall back to the
+        # MoviePy extraction when the container isn't readable (e.g. mp4)
+        decoded = None
+        try:
+            import soundfile
+            decoded = soundfile.read(
+                self.video.filename, dtype='float32', always_2d=False
+            )
+        except Exception:
+            decoded = None
+
+        if decoded is not None:
+            y, sr = decoded
+            num_frames = int(self.video.fps * self.video.duration)
+            self.audio_feature_extractor.extract_from_array(
+                y, sr,
+                n_mfcc=n_mfcc,
+                hop_length=hop_length,
+                num_frames=num_frames
+            )
+        else:
+            self.audio_feature_extractor.extract_from_video(
+                self.video,
+                n_mfcc=n_mfcc,
+                hop_length=hop_length
+            )
+
         # Share the extracted features with the element manager
         self.element_manager.set_audio_features(self.audio_feature_extractor.features)
         
@@ -138,19 +229,113 @@ class AudioVisualOverlay:
         if not self.video:
             logger.error("No video loaded.")
             return self
-            
+
+        # Start from the original video so calling process() twice
+        # (common in REPL/notebook sessions) doesn't composite on top of
+        # the previous composite
+        if self._original_video is not None:
+            self.video = self._original_video
+
         # Render all elements
         element_clips = self.element_manager.render_all()
-        
+
         # Create the final composite video
         if element_clips:
-            all_clips = [self.video] + element_clips
-            self.video = CompositeVideoClip(all_clips, size=self.video.size)
-            
+            self.video = self._composite_clips(self.video, element_clips)
+
             # Update the exporter with the new video
             self.exporter.set_video(self.video)
-            
+
         return self
+
+    def _composite_clips(self, base_video, element_clips):
+        """Composite element clips onto the base video by blitting
+
+        Renders each overlay at its native (w, h) and blends only the
+        bounded rect into the base frame, rather than handing overlays to
+        CompositeVideoClip which allocates a full-frame buffer per overlay.
+
+        Args:
+            base_video: The base video clip
+            element_clips: List of positioned overlay clips
+
+        Returns:
+            VideoClip: The composited video
+        """
+        fps = base_video.fps
+        duration = base_video.duration
+        n_frames = max(1, int(round(fps * duration)))
+        video_w, video_h = base_video.size
+
+        # Bucket clips by the frame indices they cover so make_frame only
+        # touches the overlays active at that time
+        frame_clips = [[] for _ in range(n_frames)]
+        for clip in element_clips:
+            start = clip.start or 0
+            end = start + (clip.duration if clip.duration else duration)
+            first = max(0, min(int(round(start * fps)), n_frames - 1))
+            last = max(first + 1, min(n_frames, int(round(end * fps))))
+            for idx in range(first, last):
+                frame_clips[idx].append(clip)
+
+        # Composited frames are fully determined by the frame index (the
+        # overlays active at an index never change after render), so a
+        # small LRU avoids recompositing when the same frame is pulled
+        # repeatedly, e.g. during preview or static reaction plateaus
+        frame_cache = OrderedDict()
+
+        def make_frame(t):
+            idx = min(int(t * fps), n_frames - 1)
+            cached = frame_cache.get(idx)
+            if cached is not None:
+                frame_cache.move_to_end(idx)
+                return cached
+
+            frame = base_video.get_frame(t).copy()
+            for clip in frame_clips[idx]:
+                self._blit_clip(frame, clip, t, video_w, video_h)
+
+            frame_cache[idx] = frame
+            if len(frame_cache) > self._FRAME_CACHE_SIZE:
+                frame_cache.popitem(last=False)
+            return frame
+
+        composite = VideoClip(make_frame, duration=duration).with_fps(fps)
+        if base_video.audio is not None:
+            composite = composite.with_audio(base_video.audio)
+        return composite
+
+    @staticmethod
+    def _blit_clip(frame, clip, t, video_w, video_h):
+        """Blend a single overlay clip into the base frame in place
+
+        Args:
+            frame: Base frame array being composited (modified in place)
+            clip: The overlay clip to blit
+            t: Time position in the video
+            video_w: Base video width in pixels
+            video_h: Base video height in pixels
+        """
+        local_t = max(0.0, t - (clip.start or 0))
+        overlay = clip.get_frame(local_t)
+        pos = clip.pos(local_t) if callable(clip.pos) else clip.pos
+        x, y = int(pos[0]), int(pos[1])
+        h, w = overlay.shape[:2]
+
+        # Clip the overlay rect to the frame bounds
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, video_w), min(y + h, video_h)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        src = overlay[y0 - y:y1 - y, x0 - x:x1 - x]
+        dst = frame[y0:y1, x0:x1]
+
+        if clip.mask is not None:
+            alpha = clip.mask.get_frame(local_t)[y0 - y:y1 - y, x0 - x:x1 - x]
+            frame[y0:y1, x0:x1] = _blend_rgba(dst, src, alpha)
+        else:
+            frame[y0:y1, x0:x1] = src
     
     def export(self, output_path, fps=None):
         """Export the processed video
@@ -0,0 +1,1855 @@
+import os
+import re
+import sys
+import math
+import logging
+import threading
+import functools
+import operator
+import tempfile
+import subprocess
+import numpy as np
+from PIL import Image
+from typing import Dict, List, Tuple, Union, Callable, Optional, Any
+
+from ._positions import (
+    NAMED_POSITIONS,
+    TEXT_POSITIONS,
+    resolve_position as _resolve_position,
+)
+
+logger = logging.getLogger(__name__)
+
+# Splits dotted feature paths on unescaped dots only, so a feature key
+# that itself contains a dot can be addressed as e.g. "bass\.low"
+_FEATURE_SPLIT_RE = re.compile(r'(?<!\\)\.')
+
+# Frame count above which the numba kernel beats plain NumPy (the fused
+# single pass only pays off once dispatch overhead is amortized)
+_NUMBA_THRESHOLD = 50000
+
+try:
+    from numba import njit, prange
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _frame_params_numba(feature, smin, smax, omin, omax,
+                            rot_speed, rot_enabled):
+        """Fused scale/opacity/angle computation over the feature array"""
+        n = feature.shape[0]
+        scales = np.empty(n)
+        opacities = np.empty(n)
+        angles = np.empty(n)
+        for i in prange(n):
+            f = feature[i]
+            scales[i] = smin + (smax - smin) * f
+            opacities[i] = omin + (omax - omin) * f
+            angles[i] = (i * rot_speed) % 360.0 if rot_enabled else 0.0
+        return scales, opacities, angles
+
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+
+def _flatten_features(features: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Flatten nested feature dicts into dotted-path keys
+
+    Args:
+        features: Nested mapping of feature arrays
+        prefix: Dotted prefix accumulated during recursion
+
+    Returns:
+        Flat mapping of 'freq_bands.bass'-style paths to leaf arrays
+    """
+    flat = {}
+    for key, value in features.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten_features(value, path))
+        else:
+            flat[path] = value
+    return flat
+
+
+class BaseEffect:
+    """Base class for FFmpeg filter-graph effects
+
+    Effects turn audio features ("sync data") into FFmpeg filter strings
+    and per-frame parameter files that downstream tooling feeds to an
+    FFmpeg invocation.
+    """
+
+    # Slots drop the per-instance __dict__ and turn attribute access in
+    # the filter-string hot path into fixed-offset loads; presets with
+    # thousands of effects shrink accordingly
+    __slots__ = (
+        'name', 'order', 'enabled', '_audio_feature', '_feature_source',
+        '_feature_transform', '_has_transform', '_feature_path',
+        '_feature_getter', '_last_raw', '_last_data', '_ones_cache',
+        'data_file', '_external_data_file',
+    )
+
+    def __init__(self, name: str, order: int = 10):
+        """Initialize the effect
+
+        Args:
+            name: Unique name used for filter stream labels
+            order: Ordering hint when several effects are chained
+        """
+        self.name = name
+        self.order = order
+        self.enabled = True
+        self._audio_feature = None
+        self._feature_source = 'features'
+        self._feature_transform = None
+        self._has_transform = False
+        self._feature_path = ()
+        self._feature_getter = None
+        self._last_raw = None
+        self._last_data = None
+        self._ones_cache = None
+        self.data_file = None
+        self._external_data_file = False
+
+    def set_audio_feature(self, feature: str, transform: Optional[Callable] = None):
+        """Bind the effect to an audio feature
+
+        Args:
+            feature: Dotted path into the sync data features
+                (e.g. "rms" or "freq_bands.bass")
+            transform: Optional callable applied to the feature array
+
+        Returns:
+            self: For method chaining
+        """
+        self._audio_feature = feature
+        self._feature_transform = transform
+        self._has_transform = transform is not None and callable(transform)
+        # Parse the dotted path once instead of per get_feature_data call
+        # and bind a resolver specialized for its depth; escaped dots
+        # stay part of their key
+        self._feature_path = tuple(
+            part.replace('\\.', '.')
+            for part in _FEATURE_SPLIT_RE.split(feature)
+        )
+        self._feature_getter = self._build_feature_getter(self._feature_path)
+        self._last_raw = None
+        self._last_data = None
+        return self
+
+    def _default_feature(self, n_frames: int) -> np.ndarray:
+        """Constant-ones fallback as a cached zero-copy broadcast view
+
+        np.broadcast_to returns a stride-0 read-only view over a single
+        element, so no n_frames-sized buffer is ever allocated or
+        touched; the view is cached per frame count.
+        """
+        cached = self._ones_cache
+        if cached is None or cached[0] != n_frames:
+            view = np.broadcast_to(
+                np.ones(1, dtype=np.float32), (n_frames,)
+            )
+            self._ones_cache = cached = (n_frames, view)
+        return cached[1]
+
+    @staticmethod
+    def _build_feature_getter(path: Tuple[str, ...]) -> Callable:
+        """Bind a resolver for a parsed feature path
+
+        The common single-key case becomes one bound dict.get call; the
+        nested case walks the pre-split path without re-parsing it.
+        """
+        if len(path) == 1:
+            return operator.methodcaller('get', path[0])
+
+        def getter(features):
+            data = features
+            for part in path:
+                data = data.get(part) if isinstance(data, dict) else None
+                if data is None:
+                    return None
+            return data
+        return getter
+
+    def get_feature_data(self, sync_data: Dict[str, Any]) -> np.ndarray:
+        """Resolve the bound audio feature from sync data
+
+        Args:
+            sync_data: Dict with 'n_frames', 'fps' and a nested
+                'features' mapping of feature arrays
+
+        Returns:
+            float32 feature array; a constant array of ones when no
+            feature is bound or the path cannot be resolved
+        """
+        if not self._audio_feature:
+            return self._default_feature(sync_data['n_frames'])
+
+        # Sibling effects in a chain resolve against the same sync data
+        # repeatedly; the raw resolved array is cached on the sync data
+        # itself (like '_flat'), so a recycled dict can never alias a
+        # stale memo the way an id()-keyed one could
+        memo = sync_data.setdefault('_resolved', {})
+        key = (self._feature_source, self._audio_feature)
+        raw = memo.get(key)
+        if raw is not None and raw is self._last_raw:
+            return self._last_data
+
+        if raw is None:
+            source = sync_data.get(self._feature_source, {})
+            if self._feature_source == 'features':
+                # One flat index shared by all effects replaces the
+                # nested walk with a single hash lookup; built lazily on
+                # first use and cached on the sync data itself
+                flat = sync_data.get('_flat')
+                if flat is None:
+                    flat = _flatten_features(source)
+                    sync_data['_flat'] = flat
+                data = flat.get(self._audio_feature)
+                if data is None:
+                    data = self._feature_getter(source)
+            else:
+                data = self._feature_getter(source)
+
+            if data is None:
+                logger.warning("Audio feature '%s' not available", self._audio_feature)
+                return self._default_feature(sync_data['n_frames'])
+
+            # float32 halves the memory traffic of the downstream
+            # vectorized parameter math and is plenty of precision for
+            # filter values
+            raw = np.asarray(data, dtype=np.float32)
+            memo[key] = raw
+
+        data = self._feature_transform(raw) if self._has_transform else raw
+        self._last_raw = raw
+        self._last_data = data
+        return data
+
+    def _prime_feature_data(self, sync_data: Dict[str, Any], data) -> None:
+        """Install a pre-resolved feature array into the memo cache
+
+        Used by EffectChain.compile to fan a shared feature array out to
+        every effect bound to the same path; the per-effect transform is
+        still applied here.
+
+        Args:
+            sync_data: The sync data the array was resolved from
+            data: The raw resolved feature array (or None)
+        """
+        if data is None:
+            return
+        raw = np.asarray(data, dtype=np.float32)
+        memo = sync_data.setdefault('_resolved', {})
+        memo[(self._feature_source, self._audio_feature)] = raw
+        self._last_raw = raw
+        self._last_data = (
+            self._feature_transform(raw) if self._has_transform else raw
+        )
+
+    def generate_filter_commands(self, sync_data: Dict[str, Any],
+                                 in_label: str = 'main',
+                                 out_label: str = 'out') -> List[str]:
+        """Generate the FFmpeg filter strings for this effect
+
+        Args:
+            sync_data: Audio sync data (see get_feature_data)
+            in_label: Stream label the effect reads from
+            out_label: Stream label the effect writes to
+
+        Returns:
+            List of FFmpeg filter strings
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def _average_feature(self, sync_data: Dict[str, Any],
+                         feature_data: np.ndarray) -> float:
+        """Segment-average of the bound feature value
+
+        Chains publish per-feature means under 'prepared_features' so N
+        effects bound to the same feature reduce the array once;
+        effects with a private transform (whose mean differs from the
+        shared one) fall back to reducing their own array.
+
+        Args:
+            sync_data: Audio sync data
+            feature_data: The effect's resolved feature array
+
+        Returns:
+            Mean feature value, 0.5 when the array is empty
+        """
+        if self._audio_feature and not self._has_transform:
+            prepared = sync_data.get('prepared_features')
+            if prepared is not None:
+                avg = prepared.get(self._audio_feature)
+                if avg is not None:
+                    return avg
+        return float(feature_data.mean()) if feature_data.size else 0.5
+
+    def supports_xstack(self) -> bool:
+        """Whether this effect can be composed through xstack
+
+        xstack places every input at a fixed pixel offset in a single
+        filter instead of chaining FFmpeg's single-threaded overlay
+        once per effect, but it cannot alpha-blend or evaluate position
+        expressions. Effects return True only when their output can be
+        placed verbatim (numeric position, fully opaque).
+
+        Returns:
+            True when the effect's overlay stage can be replaced by an
+            xstack placement
+        """
+        return False
+
+    def get_xstack_spec(self) -> Tuple[str, str]:
+        """Return the (input_label, layout_position) pair for xstack
+
+        Only meaningful when supports_xstack() returns True.
+
+        Returns:
+            Tuple of the prepared stream label and the "x_y" layout
+            fragment for this effect
+        """
+        raise NotImplementedError("Effect does not support xstack composition")
+
+    def iter_filter_fragments(self, sync_data: Dict[str, Any],
+                              in_label: str = 'main',
+                              out_label: str = 'out'):
+        """Yield this effect's filter fragments one at a time
+
+        Lets callers feed many effects into a single ';'.join without
+        materializing intermediate per-effect lists.
+
+        Args:
+            sync_data: Audio sync data
+            in_label: Stream label the effect reads from
+            out_label: Stream label the effect writes to
+
+        Yields:
+            FFmpeg filter strings
+        """
+        yield from self.generate_filter_commands(sync_data, in_label, out_label)
+
+    def _frame_parameters(self, sync_data: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Compute the per-frame reactive parameters of this effect
+
+        Args:
+            sync_data: Audio sync data
+
+        Returns:
+            Mapping of parameter name to per-frame value array; empty
+            for effects without per-frame parameters
+        """
+        return {}
+
+    def _write_parameter_file(self, params: Dict[str, np.ndarray]):
+        """Write the per-frame parameter table unless a chain already
+        assigned a shared data file"""
+        if not self._external_data_file:
+            self.data_file = _write_frame_data(list(params.values()))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the effect configuration"""
+        return {
+            'type': type(self).__name__,
+            'name': self.name,
+            'order': self.order,
+            'audio_feature': self._audio_feature,
+        }
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> 'BaseEffect':
+        """Build an effect from a configuration dict"""
+        effect = cls(config['name'], config.get('order', 10))
+        if config.get('audio_feature'):
+            effect.set_audio_feature(config['audio_feature'])
+        return effect
+
+
+def _write_frame_data(columns: List[np.ndarray]) -> str:
+    """Write a per-frame parameter table to a temp file
+
+    Args:
+        columns: Per-frame parameter arrays, all of equal length
+
+    Returns:
+        Path of the written data file
+    """
+    table = np.column_stack([np.arange(len(columns[0]))] + list(columns))
+    fmt = '%d' + ' %.6f' * len(columns)
+    # One open syscall (mkstemp + reopen would be two) and one large
+    # buffer so the formatter output isn't flushed in thousands of
+    # small writes
+    with tempfile.NamedTemporaryFile(
+        'w', suffix='.txt', delete=False, buffering=1 << 20
+    ) as f:
+        np.savetxt(f, table, fmt=fmt)
+        return f.name
+
+
+def _fit_frames(data: np.ndarray, n_frames: int) -> np.ndarray:
+    """Fit a feature array to exactly n_frames entries
+
+    Longer arrays are truncated (a zero-copy slice); shorter ones are
+    zero-padded at the tail. np.resize would instead tile the feature
+    cyclically, replaying the start of the track over the trailing
+    frames, which is never what a reactive overlay wants.
+
+    Args:
+        data: Feature value array
+        n_frames: Target frame count
+
+    Returns:
+        Array of exactly n_frames values
+    """
+    if len(data) >= n_frames:
+        return data[:n_frames]
+    return np.pad(data, (0, n_frames - len(data)))
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_exists(path: str) -> bool:
+    """Memoized os.path.exists; one stat syscall per distinct path"""
+    return os.path.exists(path)
+
+
+def _file_exists(path: Optional[str]) -> bool:
+    """Cached existence check for asset paths consulted on every render
+
+    Logo and font paths don't change between renders of the same
+    effect, so the stat syscall only happens once per path; empty and
+    None paths short-circuit before touching the cache at all.
+    """
+    if not path:
+        return False
+    return _cached_exists(path)
+
+
+def _position_fragment(position: Tuple, template: str = '{0}:{1}') -> Tuple[str, bool]:
+    """Render a resolved position to its filter-string fragment once
+
+    Numeric positions are formatted with plain integer substitution;
+    expression positions produce an interned string so repeated renders
+    reuse one object instead of re-concatenating the expressions.
+
+    Args:
+        position: Resolved (x, y) tuple of ints or expression strings
+        template: Fragment template with {0}/{1} placeholders
+
+    Returns:
+        (fragment, is_numeric) tuple
+    """
+    x, y = position
+    if isinstance(x, int) and isinstance(y, int):
+        return template.format(x, y), True
+    return sys.intern(template.format(x, y)), False
+
+
+# Color-shift palette (white -> red) precomputed for all 256 intensity
+# levels so the render path does a table lookup instead of formatting a
+# fresh hex string per call
+_SHIFT_COLOR_LUT = tuple(
+    "#ff{:02x}{:02x}".format(255 - i, 255 - i) for i in range(256)
+)
+
+# Hardware-accelerated counterparts of the overlay filter and the
+# upload stage that moves a software frame onto the device
+_HW_OVERLAY = {'cuda': 'overlay_cuda', 'vaapi': 'overlay_vaapi'}
+_HW_UPLOAD = {'cuda': 'hwupload_cuda', 'vaapi': 'hwupload'}
+
+# Glow shadow fragment with only the color left dynamic; compiled once
+# at import like the other %-style filter templates
+_GLOW_TMPL = ":shadowcolor=%s@0.4:shadowx=2:shadowy=2"
+
+
+# Translation table for escaping characters FFmpeg's filtergraph parser
+# treats specially inside quoted movie= paths; str.translate runs the
+# scan in C in a single pass
+_PATH_ESCAPE_TABLE = str.maketrans({
+    "\\": "\\\\", "'": "'\\''", ":": "\\:",
+})
+
+
+def _ff_escape(s: str) -> str:
+    """Escape a string for embedding in an FFmpeg filter expression
+
+    Callers apply this once when the value is set, so render paths
+    splice prebuilt, already-escaped fragments.
+
+    Args:
+        s: Raw text or path value
+
+    Returns:
+        The escaped string
+    """
+    return s.translate(_PATH_ESCAPE_TABLE)
+
+
+# Filter-string templates compiled once at import; the builders fill in
+# only the dynamic fields instead of concatenating fresh strings
+_LOGO_MOVIE_TMPL = "movie='{path}'[logo_{name}]"
+_LOGO_ROTATE_STAGE = "rotate=%.6f:c=0x00000000"
+
+# Degrees-to-radians memo; rotation angles repeat across builds (they
+# only depend on speed and frame count), so the conversion is done once
+# per distinct angle and the filter carries a bare numeric constant
+# instead of an expression FFmpeg re-evaluates every frame
+_ROT_CACHE: Dict[float, float] = {}
+
+
+def _radians(angle: float) -> float:
+    """Convert a rotation angle to radians through the memo cache
+
+    Args:
+        angle: Rotation angle in degrees
+
+    Returns:
+        The angle in radians
+    """
+    rad = _ROT_CACHE.get(angle)
+    if rad is None:
+        rad = math.radians(angle)
+        _ROT_CACHE[angle] = rad
+    return rad
+
+
+class LogoOverlayEffect(BaseEffect):
+    """Overlays a (possibly audio-reactive) logo image on the video"""
+
+    NAMED_POSITIONS = NAMED_POSITIONS
+
+    __slots__ = (
+        'logo_path', 'position', '_pos_str', '_pos_is_numeric', 'scale',
+        'opacity', 'hw_accel', '_scale_min', '_scale_max', '_scale_delta',
+        '_opacity_min', '_opacity_max', '_opacity_delta',
+        '_rotation', '_rotation_speed', '_escaped_path',
+        '_movie_fragment', '_movie_direct', '_path_validated',
+        '_transform_head', '_transform_tail', '_overlay_tmpl',
+        '_static_dict', '_has_alpha',
+    )
+
+    # Keys a to_dict()-produced config always carries; configs with all
+    # of them can skip the setter-based compatibility path
+    _CONFIG_KEYS = frozenset((
+        'name', 'order', 'logo_path', 'position', 'scale', 'opacity',
+        'scale_min', 'scale_max', 'opacity_min', 'opacity_max',
+        'rotation', 'rotation_speed',
+    ))
+
+    # Constructor defaults driving from_dict's single-unpack path
+    _DEFAULTS = {
+        'position': 'top-right', 'scale': 1.0, 'opacity': 1.0,
+        'hw_accel': None, 'name': 'logo', 'order': 10,
+    }
+
+    def __init__(self, logo_path: str, position: Union[str, Tuple] = 'top-right',
+                 scale: float = 1.0, opacity: float = 1.0,
+                 hw_accel: Optional[str] = None,
+                 name: str = 'logo', order: int = 10):
+        """Initialize the logo overlay effect
+
+        Args:
+            logo_path: Path to the logo image file
+            position: Named position or (x, y) expression tuple
+            scale: Static scale factor
+            opacity: Static opacity (0-1)
+            hw_accel: 'cuda' or 'vaapi' to run the scale/overlay stages
+                on the GPU; None keeps the software filters
+            name: Unique effect name
+            order: Ordering hint for chains
+        """
+        super().__init__(name, order)
+        self.logo_path = logo_path
+        self._prepare_path()
+        self.position = _resolve_position(position)
+        self._pos_str, self._pos_is_numeric = _position_fragment(self.position)
+        self.scale = scale
+        self.opacity = opacity
+        self.hw_accel = hw_accel
+        self._scale_min = scale
+        self._scale_max = scale
+        self._scale_delta = 0.0
+        self._opacity_min = opacity
+        self._opacity_max = opacity
+        self._opacity_delta = 0.0
+        self._rotation = False
+        self._rotation_speed = 1.0
+        self._has_alpha = None
+        self._rebuild_filter_templates()
+
+    def _rebuild_filter_templates(self):
+        """Pre-render the static parts of the filter strings
+
+        The transform stage list is assembled per build (stages whose
+        parameters resolve to identity are elided), so only the label
+        bookends and the overlay template are baked here.
+        """
+        self._transform_head = f"[logo_{self.name}]"
+        self._transform_tail = f"[scaled_logo_{self.name}]"
+        # Identity transforms bypass the transform chain entirely, so
+        # the movie source then feeds the overlay label directly
+        self._movie_direct = (
+            f"movie='{self._escaped_path}'[scaled_logo_{self.name}]"
+        )
+        overlay = _HW_OVERLAY.get(self.hw_accel, 'overlay')
+        self._overlay_tmpl = (
+            f"[%s][scaled_logo_{self.name}]{overlay}={self._pos_str}"
+            f":shortest=1[%s]"
+        )
+        # These fields never change after construction, so to_dict
+        # copies this prebuilt subset instead of rebuilding it per call
+        self._static_dict = {
+            'type': type(self).__name__,
+            'name': self.name,
+            'order': self.order,
+            'logo_path': self.logo_path,
+            'position': self.position,
+            'scale': self.scale,
+            'opacity': self.opacity,
+            'hw_accel': self.hw_accel,
+        }
+
+    def _prepare_path(self):
+        """Normalize, escape and pre-render the movie source fragment
+
+        The absolute path resolution and escaping happen once here so
+        every filter build reuses the finished movie= string.
+        """
+        self._escaped_path = os.path.abspath(
+            self.logo_path
+        ).translate(_PATH_ESCAPE_TABLE)
+        self._movie_fragment = _LOGO_MOVIE_TMPL.format(
+            path=self._escaped_path, name=self.name
+        )
+        self._path_validated = False
+
+    def set_scale_range(self, min_scale: float, max_scale: float):
+        """Make the logo scale react to the bound audio feature"""
+        self._scale_min = min_scale
+        self._scale_max = max_scale
+        # The span is invariant until the next setter call, so the
+        # render path interpolates without re-deriving it
+        self._scale_delta = max_scale - min_scale
+        return self
+
+    def set_opacity_range(self, min_opacity: float, max_opacity: float):
+        """Make the logo opacity react to the bound audio feature"""
+        self._opacity_min = max(0.0, min(1.0, min_opacity))
+        self._opacity_max = max(0.0, min(1.0, max_opacity))
+        self._opacity_delta = self._opacity_max - self._opacity_min
+        return self
+
+    def enable_rotation(self, speed: float = 1.0):
+        """Rotate the logo continuously at `speed` degrees per frame"""
+        self._rotation = True
+        self._rotation_speed = speed
+        self._rebuild_filter_templates()
+        return self
+
+    def generate_filter_commands(self, sync_data: Dict[str, Any],
+                                 in_label: str = 'main',
+                                 out_label: str = 'out') -> List[str]:
+        """Generate the movie/scale/overlay filter chain for the logo
+
+        Per-frame scale/opacity/angle values are computed for the whole
+        clip in a handful of vectorized NumPy operations and written to a
+        frame-parameter data file in one pass; the filter strings use the
+        segment-average feature value.
+
+        Args:
+            sync_data: Audio sync data
+            in_label: Stream label the overlay reads from
+            out_label: Stream label the overlay writes to
+
+        Returns:
+            List of FFmpeg filter strings
+        """
+        # Validate the logo file once; subsequent builds skip the stat
+        # syscall entirely
+        if not self._path_validated:
+            if not os.path.isfile(self.logo_path):
+                raise ValueError(f"Logo file not found: {self.logo_path}")
+            self._path_validated = True
+
+        n_frames = sync_data['n_frames']
+        feature_data = self.get_feature_data(sync_data)
+
+        self._write_parameter_file(self._frame_parameters(sync_data))
+
+        # Segment-level filter chain driven by the average feature value
+        avg_feature = self._average_feature(sync_data, feature_data)
+        scale = self._scale_min + self._scale_delta * avg_feature
+        opacity = self._opacity_min + self._opacity_delta * avg_feature
+
+        # A fully-identity transform is algebraically a no-op; overlay
+        # the decoded logo directly and skip the transform pass (the
+        # hardware path always needs at least the upload stage)
+        if (scale == 1.0 and opacity == 1.0 and not self._rotation
+                and self.hw_accel is None):
+            return [
+                self._movie_direct,
+                self._overlay_tmpl % (in_label, out_label),
+            ]
+
+        # Every transform stage is a full pass over the logo frame in
+        # FFmpeg (these are all linear image ops, but there is no stock
+        # filter taking a fused affine matrix), so the next best thing
+        # is eliding stages whose parameters resolve to identity
+        stages = []
+        if self.hw_accel is not None:
+            # Stages without a hardware counterpart (rotate, alpha
+            # multiply) run in software before the frame is uploaded;
+            # scaling then happens on the device
+            if self._rotation:
+                angle = (self._rotation_speed * n_frames / 2) % 360
+                stages.append(_LOGO_ROTATE_STAGE % _radians(angle))
+            stages.append("format=rgba")
+            if opacity != 1.0:
+                stages.append(f"colorchannelmixer=aa={opacity}")
+            if self.hw_accel == 'cuda':
+                # overlay_cuda only accepts nv12/yuv420p/yuva420p
+                # overlay frames; yuva420p keeps the alpha the blend
+                # needs (VAAPI surfaces take rgba directly)
+                stages.append("format=yuva420p")
+            stages.append(_HW_UPLOAD[self.hw_accel])
+            if scale != 1.0:
+                hw_scale = 'scale_cuda' if self.hw_accel == 'cuda' else 'scale_vaapi'
+                stages.append(f"{hw_scale}=iw*{scale}:ih*{scale}")
+            # overlay_cuda/overlay_vaapi require device frames on BOTH
+            # inputs and FFmpeg does not auto-insert hwupload, so the
+            # main stream is uploaded here as well; the composite is
+            # downloaded again afterwards so out_label stays a software
+            # stream for downstream consumers
+            hw_main = f"hw_{self.name}_main"
+            hw_out = f"hw_{self.name}_out"
+            return [
+                self._movie_fragment,
+                self._transform_head + ",".join(stages) + self._transform_tail,
+                f"[{in_label}]format=nv12,{_HW_UPLOAD[self.hw_accel]}[{hw_main}]",
+                self._overlay_tmpl % (hw_main, hw_out),
+                f"[{hw_out}]hwdownload,format=nv12[{out_label}]",
+            ]
+        if scale != 1.0:
+            stages.append(f"scale=iw*{scale}:ih*{scale}")
+        if self._rotation:
+            angle = (self._rotation_speed * n_frames / 2) % 360
+            stages.append(_LOGO_ROTATE_STAGE % _radians(angle))
+        stages.append("format=rgba")
+        if opacity != 1.0:
+            stages.append(f"colorchannelmixer=aa={opacity}")
+        transform = (
+            self._transform_head + ",".join(stages) + self._transform_tail
+        )
+
+        return [
+            self._movie_fragment,
+            transform,
+            self._overlay_tmpl % (in_label, out_label),
+        ]
+
+    def supports_xstack(self) -> bool:
+        """True when the logo can be placed by xstack instead of overlay
+
+        Requires a numeric position and a fully opaque, non-rotating
+        logo: xstack cannot alpha-blend, and rotation fills the corners
+        with transparency that only overlay composes correctly. "Fully
+        opaque" covers the image itself, not just the opacity setting —
+        a logo PNG with a transparent background would be painted as an
+        opaque rectangle by xstack, so it is probed once and excluded.
+        """
+        return (self._pos_is_numeric
+                and not self._rotation
+                and self._opacity_min == 1.0
+                and self._opacity_max == 1.0
+                and self.hw_accel is None
+                and not self._image_has_alpha())
+
+    def _image_has_alpha(self) -> bool:
+        """Whether the decoded logo carries any transparency
+
+        Probed lazily (only when xstack fusion is considered) and cached
+        for the lifetime of the effect; the file is decoded at most once.
+
+        Returns:
+            True when the image has a non-opaque alpha channel or a
+            palette transparency entry, or when it cannot be read
+        """
+        if self._has_alpha is None:
+            try:
+                with Image.open(self.logo_path) as img:
+                    if 'A' in img.getbands():
+                        self._has_alpha = img.getchannel('A').getextrema()[0] < 255
+                    else:
+                        self._has_alpha = 'transparency' in img.info
+            except Exception:
+                # Unreadable at probe time; assume transparency so the
+                # overlay path (which composites it correctly) is used
+                self._has_alpha = True
+        return self._has_alpha
+
+    def get_xstack_spec(self) -> Tuple[str, str]:
+        """Return the scaled-logo label and its xstack layout position"""
+        return (
+            f"scaled_logo_{self.name}",
+            f"{self.position[0]}_{self.position[1]}",
+        )
+
+    def _frame_parameters(self, sync_data: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Compute per-frame scale/opacity/angle arrays vectorized"""
+        n_frames = sync_data['n_frames']
+        feature_data = self.get_feature_data(sync_data)
+        fd = _fit_frames(np.asarray(feature_data, dtype=np.float64), n_frames)
+
+        # For very long videos the JIT kernel fuses all three parameter
+        # streams into one parallel pass over the feature array
+        if _NUMBA_AVAILABLE and n_frames > _NUMBA_THRESHOLD:
+            scales, opacities, angles = _frame_params_numba(
+                fd, self._scale_min, self._scale_max,
+                self._opacity_min, self._opacity_max,
+                self._rotation_speed, self._rotation,
+            )
+            return {'scale': scales, 'opacity': opacities, 'angle': angles}
+
+        if self._scale_delta == 0.0:
+            scales = np.full(n_frames, self._scale_min)
+        else:
+            scales = self._scale_min + self._scale_delta * fd
+
+        if self._opacity_delta == 0.0:
+            opacities = np.full(n_frames, self._opacity_min)
+        else:
+            opacities = self._opacity_min + self._opacity_delta * fd
+
+        if self._rotation:
+            angles = (np.arange(n_frames) * self._rotation_speed) % 360
+        else:
+            angles = np.zeros(n_frames)
+
+        return {'scale': scales, 'opacity': opacities, 'angle': angles}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the effect configuration
+
+        The construction-time fields come from the prebuilt static
+        subset; only the mutable reactive fields are inserted per call.
+        """
+        config = dict(self._static_dict)
+        config.update({
+            'audio_feature': self._audio_feature,
+            'scale_min': self._scale_min,
+            'scale_max': self._scale_max,
+            'opacity_min': self._opacity_min,
+            'opacity_max': self._opacity_max,
+            'rotation': self._rotation,
+            'rotation_speed': self._rotation_speed,
+        })
+        return config
+
+    @classmethod
+    def _fast_from_dict(cls, config: Dict[str, Any]) -> 'LogoOverlayEffect':
+        """Deserialize a canonical config writing attributes directly
+
+        Skips the validation and redundant attribute writes of the
+        public setters; only safe for configs produced by to_dict(),
+        which from_dict verifies before delegating here.
+        """
+        effect = cls.__new__(cls)
+        BaseEffect.__init__(effect, config['name'], config['order'])
+        effect.logo_path = config['logo_path']
+        effect._prepare_path()
+        effect.position = _resolve_position(config['position'])
+        effect._pos_str, effect._pos_is_numeric = _position_fragment(
+            effect.position
+        )
+        effect.scale = config['scale']
+        effect.opacity = config['opacity']
+        effect.hw_accel = config.get('hw_accel')
+        effect._scale_min = config['scale_min']
+        effect._scale_max = config['scale_max']
+        effect._opacity_min = config['opacity_min']
+        effect._opacity_max = config['opacity_max']
+        effect._scale_delta = effect._scale_max - effect._scale_min
+        effect._opacity_delta = effect._opacity_max - effect._opacity_min
+        effect._rotation = config['rotation']
+        effect._rotation_speed = config['rotation_speed']
+        effect._rebuild_filter_templates()
+        if config.get('audio_feature'):
+            effect.set_audio_feature(config['audio_feature'])
+        return effect
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> 'LogoOverlayEffect':
+        """Build a logo effect from a configuration dict"""
+        # Canonical (to_dict-shaped) configs take the direct-write path;
+        # partial hand-written configs fall through to the setters
+        if cls._CONFIG_KEYS <= config.keys():
+            return cls._fast_from_dict(config)
+
+        effect = cls(
+            config['logo_path'],
+            **{k: config.get(k, v) for k, v in cls._DEFAULTS.items()},
+        )
+        effect.set_scale_range(
+            config.get('scale_min', effect.scale),
+            config.get('scale_max', effect.scale),
+        )
+        effect.set_opacity_range(
+            config.get('opacity_min', effect.opacity),
+            config.get('opacity_max', effect.opacity),
+        )
+        if config.get('rotation'):
+            effect.enable_rotation(config.get('rotation_speed', 1.0))
+        if config.get('audio_feature'):
+            effect.set_audio_feature(config['audio_feature'])
+        return effect
+
+
+class TextOverlayEffect(BaseEffect):
+    """Draws (possibly audio-reactive) text on the video"""
+
+    NAMED_POSITIONS = TEXT_POSITIONS
+
+    __slots__ = (
+        'text', 'position', '_pos_str', '_pos_is_numeric', 'font_size',
+        'font_color', 'font_path', '_opacity_min', '_opacity_max',
+        '_opacity_delta', '_bg_box', '_box_color', '_box_opacity', '_glow', '_color_shift',
+        '_static_prefix', '_static_suffix', '_extra_params_str',
+    )
+
+    # Constructor-managed parameters that extra kwargs may not override
+    _RESERVED = frozenset((
+        'text', 'position', 'fontsize', 'fontcolor', 'fontfile',
+        'name', 'order', 'x', 'y',
+    ))
+
+    # Constructor defaults driving from_dict's single-unpack path
+    _DEFAULTS = {
+        'position': 'bottom-center', 'font_size': 30,
+        'font_color': 'white', 'font_path': None,
+        'name': 'text', 'order': 20,
+    }
+
+    def __init__(self, text: str, position: Union[str, Tuple] = 'bottom-center',
+                 font_size: int = 30, font_color: str = 'white',
+                 font_path: Optional[str] = None,
+                 name: str = 'text', order: int = 20, **extra_params):
+        """Initialize the text overlay effect
+
+        Args:
+            text: Text content
+            position: Named position or (x, y) expression tuple
+            font_size: Font size in pixels
+            font_color: Font color name or hex string
+            font_path: Optional path to a font file
+            name: Unique effect name
+            order: Ordering hint for chains
+            **extra_params: Additional drawtext parameters appended
+                verbatim to the filter (reserved keys are dropped)
+        """
+        super().__init__(name, order)
+        self.text = text
+        self.position = _resolve_position(position, TEXT_POSITIONS)
+        self._pos_str, self._pos_is_numeric = _position_fragment(
+            self.position, 'x={0}:y={1}'
+        )
+        self.font_size = font_size
+        self.font_color = font_color
+        self.font_path = font_path
+        self._opacity_min = 1.0
+        self._opacity_max = 1.0
+        self._opacity_delta = 0.0
+        self._bg_box = False
+        self._box_color = 'black'
+        self._box_opacity = 0.5
+        self._glow = False
+        self._color_shift = False
+        # Filter and render the passthrough parameters exactly once
+        self._extra_params_str = ':'.join(
+            f"{k}={v}" for k, v in extra_params.items()
+            if k not in self._RESERVED
+        )
+        self._rebuild_static_parts()
+
+    def _rebuild_static_parts(self):
+        """Precompute the drawtext fragments that never vary per render
+
+        Only the font color (opacity/color shift) and the glow shadow
+        depend on the audio feature; everything else is fixed at
+        configuration time, so generate_filter_commands just splices
+        the dynamic color between two prebuilt strings.
+        """
+        fontfile = (
+            f":fontfile='{_ff_escape(os.path.abspath(self.font_path))}'"
+            if _file_exists(self.font_path) else ""
+        )
+        self._static_prefix = (
+            f"drawtext=text='{_ff_escape(self.text)}'"
+            f"{fontfile}:fontsize={self.font_size}"
+        )
+        box = (
+            f":box=1:boxcolor={self._box_color}@{self._box_opacity}:boxborderw=8"
+            if self._bg_box else ""
+        )
+        extra = ":" + self._extra_params_str if self._extra_params_str else ""
+        self._static_suffix = ":" + self._pos_str + box + extra
+
+    def set_opacity_range(self, min_opacity: float, max_opacity: float):
+        """Make the text opacity react to the bound audio feature"""
+        self._opacity_min = max(0.0, min(1.0, min_opacity))
+        self._opacity_max = max(0.0, min(1.0, max_opacity))
+        self._opacity_delta = self._opacity_max - self._opacity_min
+        return self
+
+    def enable_background_box(self, color: str = 'black', opacity: float = 0.5):
+        """Draw a translucent box behind the text"""
+        self._bg_box = True
+        self._box_color = color
+        self._box_opacity = opacity
+        self._rebuild_static_parts()
+        return self
+
+    def enable_glow(self):
+        """Add a soft shadow/glow behind the text"""
+        self._glow = True
+        return self
+
+    def enable_color_shift(self):
+        """Shift the text color toward red as the feature intensifies"""
+        self._color_shift = True
+        return self
+
+    def generate_filter_commands(self, sync_data: Dict[str, Any],
+                                 in_label: str = 'main',
+                                 out_label: str = 'out') -> List[str]:
+        """Generate the drawtext filter for the text overlay
+
+        Per-frame opacity values are computed vectorized and written to a
+        frame-parameter data file in one pass; the filter string itself
+        is driven by the segment-average feature value.
+
+        Args:
+            sync_data: Audio sync data
+            in_label: Stream label the drawtext reads from
+            out_label: Stream label the drawtext writes to
+
+        Returns:
+            List of FFmpeg filter strings
+        """
+        feature_data = self.get_feature_data(sync_data)
+
+        self._write_parameter_file(self._frame_parameters(sync_data))
+
+        avg_feature = self._average_feature(sync_data, feature_data)
+        opacity = self._opacity_min + self._opacity_delta * avg_feature
+
+        if self._color_shift:
+            intensity = min(255, max(0, int(avg_feature * 255)))
+            color = _SHIFT_COLOR_LUT[intensity]
+        else:
+            color = self.font_color
+
+        glow = _GLOW_TMPL % color if self._glow else ""
+        return [
+            f"[{in_label}]{self._static_prefix}"
+            f":fontcolor={color}@{opacity}"
+            f"{self._static_suffix}{glow}[{out_label}]"
+        ]
+
+    def _frame_parameters(self, sync_data: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Compute per-frame opacity/intensity arrays vectorized"""
+        n_frames = sync_data['n_frames']
+        feature_data = self.get_feature_data(sync_data)
+        fd = _fit_frames(np.asarray(feature_data, dtype=np.float64), n_frames)
+
+        if self._opacity_delta == 0.0:
+            opacities = np.full(n_frames, self._opacity_min)
+        else:
+            opacities = self._opacity_min + self._opacity_delta * fd
+
+        return {'opacity': opacities, 'intensity': fd}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the effect configuration"""
+        config = super().to_dict()
+        config.update({
+            'text': self.text,
+            'position': self.position,
+            'font_size': self.font_size,
+            'font_color': self.font_color,
+            'font_path': self.font_path,
+            'opacity_min': self._opacity_min,
+            'opacity_max': self._opacity_max,
+            'bg_box': self._bg_box,
+            'box_color': self._box_color,
+            'box_opacity': self._box_opacity,
+            'glow': self._glow,
+            'color_shift': self._color_shift,
+        })
+        return config
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> 'TextOverlayEffect':
+        """Build a text effect from a configuration dict"""
+        effect = cls(
+            config['text'],
+            **{k: config.get(k, v) for k, v in cls._DEFAULTS.items()},
+        )
+        effect.set_opacity_range(
+            config.get('opacity_min', 1.0),
+            config.get('opacity_max', 1.0),
+        )
+        if config.get('bg_box'):
+            effect.enable_background_box(
+                config.get('box_color', 'black'),
+                config.get('box_opacity', 0.5),
+            )
+        if config.get('glow'):
+            effect.enable_glow()
+        if config.get('color_shift'):
+            effect.enable_color_shift()
+        if config.get('audio_feature'):
+            effect.set_audio_feature(config['audio_feature'])
+        return effect
+
+
+class SpectrumVisualizerEffect(BaseEffect):
+    """Renders an audio spectrum visualization over the video"""
+
+    NAMED_POSITIONS = NAMED_POSITIONS
+
+    __slots__ = (
+        'width', 'height', 'bands', 'position', '_pos_str',
+        '_pos_is_numeric', '_bar_width', '_bar_gap', '_rainbow',
+        '_cached_filters', '_cached_labels', '_extra_params_str',
+        '_precompute_proc', '_precompute_path', 'hw_accel',
+    )
+
+    # Constructor-managed parameters that extra kwargs may not override
+    _RESERVED = frozenset(('s', 'size', 'mode', 'color', 'slide', 'name', 'order'))
+
+    # Constructor defaults driving from_dict's single-unpack path
+    _DEFAULTS = {
+        'width': 640, 'height': 120, 'bands': 32,
+        'position': 'bottom-center', 'hw_accel': None,
+        'name': 'spectrum', 'order': 30,
+    }
+
+    def __init__(self, width: int = 640, height: int = 120, bands: int = 32,
+                 position: Union[str, Tuple] = 'bottom-center',
+                 hw_accel: Optional[str] = None,
+                 name: str = 'spectrum', order: int = 30, **extra_params):
+        """Initialize the spectrum visualizer effect
+
+        Args:
+            width: Width of the rendered spectrum in pixels
+            height: Height of the rendered spectrum in pixels
+            bands: Number of spectrum bands
+            position: Named position or (x, y) expression tuple
+            hw_accel: 'cuda' or 'vaapi' to run the overlay stage on the
+                GPU; None keeps the software filters
+            name: Unique effect name
+            order: Ordering hint for chains
+            **extra_params: Additional showspectrum parameters appended
+                verbatim to the filter (reserved keys are dropped)
+        """
+        super().__init__(name, order)
+        self.width = width
+        self.height = height
+        self.bands = bands
+        self.position = _resolve_position(position)
+        self._pos_str, self._pos_is_numeric = _position_fragment(self.position)
+        self.hw_accel = hw_accel
+        # Derived lazily through the bar_width property; __slots__
+        # precludes functools.cached_property, so None marks "not yet
+        # computed" and set_bar_style overrides it directly
+        self._bar_width = None
+        self._bar_gap = 1
+        self._rainbow = False
+        self._cached_filters = None
+        self._cached_labels = None
+        self._precompute_proc = None
+        self._precompute_path = None
+        self._extra_params_str = ':'.join(
+            f"{k}={v}" for k, v in extra_params.items()
+            if k not in self._RESERVED
+        )
+
+    @property
+    def bar_width(self) -> int:
+        """Bar width in pixels, derived from width // bands on first use"""
+        if self._bar_width is None:
+            self._bar_width = self.width // self.bands
+        return self._bar_width
+
+    def set_bar_style(self, bar_width: int, bar_gap: int = 1):
+        """Override the computed bar geometry"""
+        self._bar_width = bar_width
+        self._bar_gap = bar_gap
+        self._cached_filters = None
+        return self
+
+    def enable_rainbow(self):
+        """Color the spectrum with a rainbow palette"""
+        self._rainbow = True
+        self._cached_filters = None
+        return self
+
+    def enable_precompute(self, audio_path: str):
+        """Pre-render the spectrum in a background FFmpeg process
+
+        showspectrum runs single-threaded inside the main pipeline;
+        rendering it to a temporary lossless file in a parallel FFmpeg
+        process takes it off the critical path. Filter builds source
+        the rendered file through movie= once the background process
+        finishes, falling back to the inline filter if it fails.
+
+        Args:
+            audio_path: Audio file to render the spectrum from
+
+        Returns:
+            self: For method chaining
+        """
+        from .export import _ffmpeg_binary
+
+        color_mode = 'rainbow' if self._rainbow else 'intensity'
+        graph = (
+            f"[0:a]showspectrum=s={self.width}x{self.height}:mode=combined:"
+            f"color={color_mode}:slide=scroll[v]"
+        )
+        with tempfile.NamedTemporaryFile(suffix='.nut', delete=False) as f:
+            out_path = f.name
+        try:
+            self._precompute_proc = subprocess.Popen(
+                [_ffmpeg_binary(), '-y', '-v', 'error', '-i', audio_path,
+                 '-filter_complex', graph, '-map', '[v]',
+                 '-c:v', 'ffv1', out_path],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            self._precompute_path = out_path
+        except OSError as e:
+            logger.warning("Spectrum precompute unavailable: %s", e)
+            self._precompute_proc = None
+            self._precompute_path = None
+        self._cached_filters = None
+        return self
+
+    def generate_filter_commands(self, sync_data: Dict[str, Any],
+                                 in_label: str = 'main',
+                                 out_label: str = 'out') -> List[str]:
+        """Generate the showspectrum/overlay filter chain
+
+        The chain depends only on the effect configuration, not the sync
+        data, so it is built lazily once and reused until a setter
+        invalidates it.
+
+        Args:
+            sync_data: Audio sync data
+            in_label: Stream label the overlay reads from
+            out_label: Stream label the overlay writes to
+
+        Returns:
+            List of FFmpeg filter strings
+        """
+        if (self._cached_filters is not None
+                and self._cached_labels == (in_label, out_label)):
+            return self._cached_filters
+
+        color_mode = 'rainbow' if self._rainbow else 'intensity'
+
+        filters = []
+        # A finished background pre-render replaces the inline
+        # showspectrum stage; the wait only blocks on whatever work the
+        # parallel process has not already completed
+        # showspectrum emits yuv444p, which the hardware overlays
+        # reject as an overlay input; convert to nv12 before the upload
+        # (the spectrum is opaque, so no alpha is lost)
+        upload = (
+            ",format=nv12," + _HW_UPLOAD[self.hw_accel]
+            if self.hw_accel is not None else ""
+        )
+        if self._precompute_proc is not None and self._precompute_proc.wait() == 0:
+            escaped = self._precompute_path.translate(_PATH_ESCAPE_TABLE)
+            filters.append(f"movie='{escaped}'{upload}[spectrum_{self.name}]")
+        else:
+            if self._precompute_proc is not None:
+                logger.warning(
+                    "Spectrum precompute failed; rendering inline"
+                )
+                self._precompute_proc = None
+            extra = ":" + self._extra_params_str if self._extra_params_str else ""
+            filters.append(
+                f"[0:a]showspectrum=s={self.width}x{self.height}:mode=combined:"
+                f"color={color_mode}:slide=scroll{extra}{upload}[spectrum_{self.name}]"
+            )
+        if self.hw_accel is not None:
+            # Both overlay inputs must be device frames (FFmpeg does not
+            # auto-insert hwupload), and the composite is downloaded
+            # again so out_label stays a software stream
+            overlay = _HW_OVERLAY[self.hw_accel]
+            hw_main = f"hw_{self.name}_main"
+            hw_out = f"hw_{self.name}_out"
+            filters.append(
+                f"[{in_label}]format=nv12,{_HW_UPLOAD[self.hw_accel]}[{hw_main}]"
+            )
+            filters.append(
+                f"[{hw_main}][spectrum_{self.name}]{overlay}={self._pos_str}:shortest=1[{hw_out}]"
+            )
+            filters.append(
+                f"[{hw_out}]hwdownload,format=nv12[{out_label}]"
+            )
+        else:
+            filters.append(
+                f"[{in_label}][spectrum_{self.name}]overlay={self._pos_str}:shortest=1[{out_label}]"
+            )
+        self._cached_filters = filters
+        self._cached_labels = (in_label, out_label)
+        return filters
+
+    def supports_xstack(self) -> bool:
+        """True when the spectrum can be placed by xstack
+
+        The showspectrum output is opaque, so only a numeric position
+        is required; hardware graphs are excluded because their upload
+        and download stages cannot be folded into a software xstack.
+        """
+        return self._pos_is_numeric and self.hw_accel is None
+
+    def get_xstack_spec(self) -> Tuple[str, str]:
+        """Return the spectrum label and its xstack layout position"""
+        return (
+            f"spectrum_{self.name}",
+            f"{self.position[0]}_{self.position[1]}",
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the effect configuration"""
+        config = super().to_dict()
+        config.update({
+            'width': self.width,
+            'height': self.height,
+            'bands': self.bands,
+            'position': self.position,
+            'bar_width': self.bar_width,
+            'bar_gap': self._bar_gap,
+            'rainbow': self._rainbow,
+            'hw_accel': self.hw_accel,
+        })
+        return config
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> 'SpectrumVisualizerEffect':
+        """Build a spectrum effect from a configuration dict"""
+        effect = cls(
+            **{k: config.get(k, v) for k, v in cls._DEFAULTS.items()},
+        )
+        effect.set_bar_style(
+            config.get('bar_width', effect.bar_width),
+            config.get('bar_gap', effect._bar_gap),
+        )
+        if config.get('rainbow'):
+            effect.enable_rainbow()
+        if config.get('audio_feature'):
+            effect.set_audio_feature(config['audio_feature'])
+        return effect
+
+
+def build_filtergraph(effects: List[BaseEffect],
+                      sync_data: Dict[str, Any]) -> str:
+    """Join the filters of several effects into one graph string
+
+    Delegates to EffectChain.build_filters so intermediate labels are
+    threaded main -> ... -> out; emitting each effect verbatim would
+    produce two readers of [main] and two writers of [out], which
+    FFmpeg rejects.
+
+    Args:
+        effects: Effects to include, in order
+        sync_data: Audio sync data
+
+    Returns:
+        The complete filtergraph text
+    """
+    return ';'.join(EffectChain(effects).build_filters(sync_data))
+
+
+def write_filter_script(filters: List[str]) -> str:
+    """Write a filtergraph to a temp file for -filter_complex_script
+
+    Passing the graph as a file sidesteps the ARG_MAX command-line limit
+    (long videos with many drawtext segments easily exceed it) and the
+    quadratic shell-quoting cost of a huge -filter_complex argument.
+
+    Args:
+        filters: FFmpeg filter strings
+
+    Returns:
+        Path of the written filtergraph script
+    """
+    with tempfile.NamedTemporaryFile(
+        'w', suffix='.filtergraph', delete=False
+    ) as f:
+        f.write(';'.join(filters))
+        return f.name
+
+
+# Matches [label] occurrences; stream specifiers like [0:a] start with a
+# digit and are deliberately not matched
+_LABEL_RE = re.compile(r'\[([A-Za-z_][A-Za-z0-9_]*)\]')
+
+
+class LabelAllocator:
+    """Hands out compact sequential stream labels
+
+    Long descriptive labels like [scaled_logo_mylogo] inflate the
+    filtergraph text super-linearly with the effect count; the allocator
+    maps each distinct label to a short stable x0/x1/... name.
+    """
+
+    def __init__(self, prefix: str = 'x'):
+        self._prefix = prefix
+        self._labels = {}
+
+    def get(self, name: str) -> str:
+        """Return the short label for a name, allocating on first use"""
+        label = self._labels.get(name)
+        if label is None:
+            label = f"{self._prefix}{len(self._labels)}"
+            self._labels[name] = label
+        return label
+
+
+# Graph text above this length goes through -filter_complex_script to
+# stay clear of the ARG_MAX command-line ceiling; smaller graphs are
+# passed inline and skip the tempfile round trip
+_INLINE_GRAPH_LIMIT = 100 * 1024
+
+
+class FilterGraphBuilder:
+    """String builder for FFmpeg filtergraphs
+
+    Collects label-referenced filter fragments in a segment list and
+    joins them exactly once at finalization, instead of growing an
+    intermediate string as fragments are concatenated.
+    """
+
+    def __init__(self):
+        self._segments = []
+
+    def append(self, fragment: str) -> 'FilterGraphBuilder':
+        """Push a single filter fragment
+
+        Returns:
+            self: For method chaining
+        """
+        self._segments.append(fragment)
+        return self
+
+    def extend(self, fragments: List[str]) -> 'FilterGraphBuilder':
+        """Push several filter fragments
+
+        Returns:
+            self: For method chaining
+        """
+        self._segments.extend(fragments)
+        return self
+
+    def graph(self) -> str:
+        """Join the accumulated fragments into the final graph text"""
+        return ';'.join(self._segments)
+
+    def to_ffmpeg_args(self) -> List[str]:
+        """Emit the graph as FFmpeg arguments
+
+        Graphs above _INLINE_GRAPH_LIMIT are written to a script file
+        and referenced with -filter_complex_script; smaller ones are
+        passed inline with -filter_complex.
+
+        Returns:
+            Argument list to splice into an ffmpeg command
+        """
+        text = self.graph()
+        if len(text) > _INLINE_GRAPH_LIMIT:
+            with tempfile.NamedTemporaryFile(
+                'w', suffix='.filtergraph', delete=False
+            ) as f:
+                f.write(text)
+                return ["-filter_complex_script", f.name]
+        return ["-filter_complex", text]
+
+
+class EffectChain:
+    """Compiles an ordered collection of effects into FFmpeg arguments"""
+
+    def __init__(self, effects: Optional[List[BaseEffect]] = None):
+        """Initialize the chain
+
+        Args:
+            effects: Optional initial effects
+        """
+        self.effects = list(effects) if effects else []
+
+    def add_effect(self, effect: BaseEffect):
+        """Add an effect to the chain
+
+        Returns:
+            self: For method chaining
+        """
+        self.effects.append(effect)
+        return self
+
+    def build_filters(self, sync_data: Dict[str, Any]) -> List[str]:
+        """Generate the filter strings for all enabled effects in order
+
+        Args:
+            sync_data: Audio sync data
+
+        Returns:
+            Concatenated list of FFmpeg filter strings with effects
+            chained main -> ... -> out and intermediate labels rewritten
+            to compact allocator names
+        """
+        ordered = [e for e in sorted(self.effects, key=lambda e: e.order)
+                   if e.enabled]
+        allocator = LabelAllocator()
+
+        def shorten(match):
+            name = match.group(1)
+            if name in ('main', 'out'):
+                return match.group(0)
+            return '[' + allocator.get(name) + ']'
+
+        fused = self._build_xstack_filters(sync_data, ordered)
+        if fused is not None:
+            return [_LABEL_RE.sub(shorten, f) for f in fused]
+
+        filters = []
+        in_label = 'main'
+        for i, effect in enumerate(ordered):
+            out_label = 'out' if i == len(ordered) - 1 else f'stage_{i}'
+            filters.extend(
+                _LABEL_RE.sub(shorten, f)
+                for f in effect.generate_filter_commands(
+                    sync_data, in_label=in_label, out_label=out_label
+                )
+            )
+            in_label = out_label
+        return filters
+
+    def _build_xstack_filters(self, sync_data: Dict[str, Any],
+                              ordered: List[BaseEffect]) -> Optional[List[str]]:
+        """Collapse all overlays into a single xstack placement
+
+        FFmpeg runs each overlay filter on one thread, so a chain of N
+        overlays serializes into N sequential passes over every frame;
+        xstack places all inputs in one filter. The collapse only
+        applies when every enabled effect reports supports_xstack()
+        (numeric position, no alpha blending required) and there are
+        enough overlays for the fusion to pay off.
+
+        Args:
+            sync_data: Audio sync data
+            ordered: Enabled effects in chain order
+
+        Returns:
+            Filter list ending in the fused xstack stage, or None when
+            the chain must fall back to the per-effect overlay path
+        """
+        if len(ordered) < 3:
+            return None
+        if not all(effect.supports_xstack() for effect in ordered):
+            return None
+
+        filters = []
+        inputs = ['[main]']
+        layouts = ['0_0']
+        for effect in ordered:
+            # By construction every effect's overlay stage is its final
+            # fragment; everything before it prepares the labeled
+            # stream xstack consumes
+            filters.extend(effect.generate_filter_commands(sync_data)[:-1])
+            label, layout = effect.get_xstack_spec()
+            inputs.append(f'[{label}]')
+            layouts.append(layout)
+
+        filters.append(
+            f"{''.join(inputs)}xstack=inputs={len(inputs)}:"
+            f"layout={'|'.join(layouts)}[out]"
+        )
+        return filters
+
+    def compile_sendcmd(self, sync_data: Dict[str, Any]) -> Optional[str]:
+        """Fuse all effects' per-frame parameters into one sendcmd script
+
+        Writes a single interleaved command file with per-effect prefixes
+        (one line per frame) and points every effect at it, so FFmpeg
+        parses one script instead of one file and one sendcmd node per
+        effect.
+
+        Args:
+            sync_data: Audio sync data
+
+        Returns:
+            Path of the fused script, or None when no effect has
+            per-frame parameters
+        """
+        fps = sync_data.get('fps', 30.0)
+        n_frames = sync_data['n_frames']
+
+        per_effect = []
+        for effect in sorted(self.effects, key=lambda e: e.order):
+            if not effect.enabled:
+                continue
+            params = effect._frame_parameters(sync_data)
+            if params:
+                per_effect.append((effect, params))
+
+        if not per_effect:
+            return None
+
+        # Flatten the (effect, param) structure once; the per-frame loop
+        # then walks a flat tuple of precomputed prefixes instead of
+        # re-traversing every effect's param dict n_frames times
+        targets = tuple(
+            (f"{effect.name} {param}", values)
+            for effect, params in per_effect
+            for param, values in params.items()
+        )
+        # Emit a command line only at frames where some parameter
+        # actually changes; long static runs (silence, plateaus)
+        # collapse to a single line, which FFmpeg holds until the next
+        table = np.column_stack(
+            [np.asarray(values, dtype=np.float64) for _, values in targets]
+        )
+        changed = np.empty(n_frames, dtype=bool)
+        changed[0] = True
+        if n_frames > 1:
+            changed[1:] = np.any(np.diff(table, axis=0) != 0, axis=1)
+
+        frame_duration = 1.0 / fps
+        lines = [
+            f"{frame * frame_duration:.6f} " + "; ".join(
+                f"{prefix} {values[frame]:.6f}" for prefix, values in targets
+            )
+            for frame in np.flatnonzero(changed)
+        ]
+
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.cmd', delete=False, buffering=1 << 20
+        ) as f:
+            f.write("\n".join(lines))
+            path = f.name
+
+        for effect, _ in per_effect:
+            effect.data_file = path
+            effect._external_data_file = True
+        return path
+
+    def compile(self, sync_data: Dict[str, Any]) -> List[str]:
+        """Compile the whole chain with one pass over the sync data
+
+        Resolves each distinct feature path once and fans the shared
+        array out to every effect bound to it (per-effect transforms
+        are still applied individually), then builds the FFmpeg
+        arguments. With many effects bound to the same feature this
+        turns O(effects) feature-dict traversals into O(unique paths).
+
+        Args:
+            sync_data: Audio sync data
+
+        Returns:
+            Argument list (see build_ffmpeg_args)
+        """
+        resolved = {}
+        prepared = sync_data.setdefault('prepared_features', {})
+        for effect in self.effects:
+            if not (effect.enabled and effect._feature_path):
+                continue
+            key = (effect._feature_source, effect._feature_path)
+            if key not in resolved:
+                data = effect._feature_getter(
+                    sync_data.get(effect._feature_source, {})
+                )
+                # Cast once here so effects without a transform share
+                # the very same float32 array
+                resolved[key] = (
+                    None if data is None
+                    else np.asarray(data, dtype=np.float32)
+                )
+                # Publish the segment mean so sibling effects bound to
+                # this feature reduce the array exactly once
+                if resolved[key] is not None and resolved[key].size:
+                    prepared.setdefault(
+                        effect._audio_feature, float(resolved[key].mean())
+                    )
+            effect._prime_feature_data(sync_data, resolved[key])
+        return self.build_ffmpeg_args(sync_data)
+
+    def build_ffmpeg_args(self, sync_data: Dict[str, Any]) -> List[str]:
+        """Build the FFmpeg filter arguments for the whole chain
+
+        The filtergraph is assembled through a FilterGraphBuilder with a
+        single join; graphs too large for the command line automatically
+        go through -filter_complex_script. Per-frame parameters are
+        fused into one shared sendcmd script beforehand.
+
+        Args:
+            sync_data: Audio sync data
+
+        Returns:
+            Argument list to splice into an ffmpeg command
+        """
+        self.compile_sendcmd(sync_data)
+        builder = FilterGraphBuilder()
+        builder.extend(self.build_filters(sync_data))
+        return builder.to_ffmpeg_args()
+
+
+# Interned keys let lookups with interned query strings hit the dict's
+# identity fast path before falling back to string comparison
+EFFECT_REGISTRY = {
+    sys.intern('LogoOverlayEffect'): LogoOverlayEffect,
+    sys.intern('TextOverlayEffect'): TextOverlayEffect,
+    sys.intern('SpectrumVisualizerEffect'): SpectrumVisualizerEffect,
+}
+
+# Pre-bound from_dict methods so bulk deserialization skips the
+# per-call class attribute descent; rebuilt alongside EFFECT_REGISTRY
+_FROM_DICT = {name: cls.from_dict for name, cls in EFFECT_REGISTRY.items()}
+
+# Registrations replace the mappings wholesale under this lock, so
+# readers use the current dicts without any synchronization
+_REGISTRY_LOCK = threading.Lock()
+
+
+def register_effect(name: str, effect_class) -> None:
+    """Register a custom effect class in the shared registry
+
+    Writes are serialized by a lock and swap in fresh mappings, so
+    concurrent create_effect calls stay lock-free.
+
+    Args:
+        name: Type name used in configs
+        effect_class: BaseEffect subclass
+    """
+    global EFFECT_REGISTRY, _FROM_DICT
+    if not issubclass(effect_class, BaseEffect):
+        raise TypeError(f"{effect_class} is not a BaseEffect subclass")
+    logger.debug("Registering effect type %s", name)
+    with _REGISTRY_LOCK:
+        updated = dict(EFFECT_REGISTRY)
+        updated[sys.intern(name)] = effect_class
+        EFFECT_REGISTRY = updated
+        _FROM_DICT = {n: c.from_dict for n, c in updated.items()}
+
+
+class EffectRegistry:
+    """Registry view over the shared effect-type mapping
+
+    Instances no longer copy the built-in registrations: lookups fall
+    back to the module-level EFFECT_REGISTRY, and a local dict is only
+    allocated when an instance-specific registration is made.
+
+    Registries can be composed hierarchically via `parent`; lookups
+    walk the ancestor chain iteratively, skipping registries that never
+    allocated a local dict.
+    """
+
+    def __init__(self, parent: Optional['EffectRegistry'] = None):
+        """Initialize the registry
+
+        Args:
+            parent: Optional registry consulted when a lookup misses
+                locally
+        """
+        self.effects = None
+        self.parent = parent
+
+    def register_effect(self, name: str, effect_class):
+        """Register a custom effect class on this instance only
+
+        Args:
+            name: Type name used in configs
+            effect_class: BaseEffect subclass
+        """
+        if not issubclass(effect_class, BaseEffect):
+            raise TypeError(f"{effect_class} is not a BaseEffect subclass")
+        logger.debug("Registering effect type %s", name)
+        if self.effects is None:
+            self.effects = {}
+        self.effects[sys.intern(name)] = effect_class
+        return self
+
+    def create_effect(self, effect_type: str, *args, **kwargs) -> BaseEffect:
+        """Instantiate a registered effect by type name
+
+        Local registrations win over ancestors, which win over the
+        shared module registry; the ancestor chain is walked with a
+        plain loop rather than recursion.
+        """
+        effect_class = None
+        node = self
+        while node is not None:
+            if node.effects is not None:
+                effect_class = node.effects.get(effect_type)
+                if effect_class is not None:
+                    break
+            node = node.parent
+        if effect_class is None:
+            effect_class = EFFECT_REGISTRY.get(effect_type)
+        if effect_class is None:
+            raise ValueError(f"Unknown effect type: {effect_type}")
+        return effect_class(*args, **kwargs)
+
+    def list_effects(self) -> List[str]:
+        """List the registered effect type names"""
+        names = list(EFFECT_REGISTRY)
+        seen = set(names)
+        node = self
+        while node is not None:
+            if node.effects:
+                names.extend(n for n in node.effects if n not in seen)
+                seen.update(node.effects)
+            node = node.parent
+        return names
+
+
+def create_effect(effect_type: str, *args, **kwargs) -> BaseEffect:
+    """Instantiate an effect by type name
+
+    The built-in types are dispatched through direct comparisons
+    against interned string constants; only custom registrations pay
+    for the registry lookup.
+
+    Args:
+        effect_type: Registered effect type name
+        *args, **kwargs: Forwarded to the effect constructor
+
+    Returns:
+        The created effect
+    """
+    if effect_type == 'LogoOverlayEffect':
+        return LogoOverlayEffect(*args, **kwargs)
+    if effect_type == 'TextOverlayEffect':
+        return TextOverlayEffect(*args, **kwargs)
+    if effect_type == 'SpectrumVisualizerEffect':
+        return SpectrumVisualizerEffect(*args, **kwargs)
+    effect_class = EFFECT_REGISTRY.get(effect_type)
+    if effect_class is None:
+        raise ValueError(f"Unknown effect type: {effect_type}")
+    return effect_class(*args, **kwargs)
+
+
+def effect_from_dict(config: Dict[str, Any]) -> BaseEffect:
+    """Deserialize an effect from a configuration dict
+
+    Args:
+        config: Dict with at least a 'type' key
+
+    Returns:
+        The deserialized effect
+    """
+    effect_type = config.get('type')
+    from_dict = _FROM_DICT.get(effect_type) if effect_type else None
+    if from_dict is None:
+        raise ValueError(f"Unknown effect type: {effect_type}")
+    return from_dict(config)
@@ -1,16 +1,70 @@
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from PIL import Image, ImageEnhance
-from moviepy.video.VideoClip import ImageClip, TextClip
+from PIL import Image
+from moviepy.video.VideoClip import ImageClip, TextClip, VideoClip
 import os
 from typing import Dict, List, Tuple, Union, Callable, Optional, Any
 
 logger = logging.getLogger(__name__)
 
+try:
+    from scipy.signal import lfilter as _lfilter
+    _SCIPY_AVAILABLE = True
+except ImportError:
+    _SCIPY_AVAILABLE = False
+
+try:
+    import cv2
+    _CV2_AVAILABLE = True
+except ImportError:
+    _CV2_AVAILABLE = False
+
+try:
+    import cupy as cp
+    _CUPY_AVAILABLE = True
+except ImportError:
+    _CUPY_AVAILABLE = False
+
+# Frame count above which the fused numba kernel beats the NumPy
+# mapping plus scipy smoothing (dispatch overhead must amortize)
+_NUMBA_THRESHOLD = 50000
+
+try:
+    from numba import njit
+
+    @njit(cache=True)
+    def _map_smooth_numba(values, min_value, max_value, smoothing):
+        """Fused range mapping and first-order smoothing over a series"""
+        out = np.empty_like(values)
+        span = max_value - min_value
+        prev = min_value + values[0] * span
+        for i in range(values.shape[0]):
+            mapped = min_value + values[i] * span
+            prev = prev + smoothing * (mapped - prev)
+            out[i] = prev
+        return out
+
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+# ITU-R 601-2 luma transform, as used by PIL's "L" conversion
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+# Row-panel budget for the fused enhancement pass; panels this size stay
+# resident in L2 across all the arithmetic steps instead of streaming
+# the whole image through every step
+_PANEL_BYTES = 64 * 1024
+
 
 class Element:
     """Base class for visual elements that can be overlaid on videos"""
-    
+
+    # Default (min, max) opacity range for the "opacity" reaction
+    _OPACITY_DEFAULTS = (0.0, 1.0)
+
     def __init__(self, clip, position: Tuple[int, int]):
         """Initialize the element with a clip and position
         
@@ -23,7 +77,9 @@ class Element:
         self.original_size = clip.size
         self.reactions = {}
         self.audio_features = None
-        
+        self._reaction_frames = None
+        self._shake_offsets = None
+
     def set_audio_features(self, features):
         """Set audio features for reactive behavior
         
@@ -63,31 +119,197 @@ class Element:
         if not self.audio_features:
             # Return static clip if no audio features available
             return [self.clip.with_position(self.position).with_duration(total_duration)]
-            
+
         # Create a sequence of frames at appropriate times
         element_clips = []
         frame_duration = 1.0 / video_fps
-        
-        # Previous values for smoothing
-        prev_values = {reaction_type: None for reaction_type in self.reactions}
-        
-        for t in np.arange(0, total_duration, frame_duration):
-            # Apply all reactions to create this frame
-            frame = self._create_frame_at_time(t, frame_duration, video_fps, prev_values)
+
+        # Evaluate every reaction across all frames in one NumPy pass
+        n_frames = int(np.ceil(total_duration * video_fps))
+        self.precompute_reactions(n_frames, video_fps)
+
+        # Integer frame enumeration keeps the index exact (no float
+        # accumulation drift) and doubles as the reaction-table index.
+        # Runs of frames whose reaction inputs quantize to the same key
+        # are coalesced into one longer clip instead of per-frame clips
+        prev_key = None
+        for i in range(n_frames):
+            t = i * frame_duration
+            key = self._frame_param_key(i)
+            if key is not None and key == prev_key and element_clips:
+                last = element_clips[-1]
+                element_clips[-1] = last.with_duration(
+                    last.duration + frame_duration
+                )
+                continue
+            frame = self._create_frame_at_time(
+                t, frame_duration, video_fps, frame_idx=i
+            )
             if frame:
                 element_clips.append(frame)
-                
+                prev_key = key
+            else:
+                prev_key = None
+
         return element_clips
+
+    def _frame_param_key(self, frame_idx: int) -> Optional[Tuple]:
+        """Build a comparable key of the reaction inputs for one frame
+
+        Every rendered parameter is a deterministic function of the
+        precomputed reaction values (plus the batched shake offsets),
+        so frames whose inputs quantize to the same key are visually
+        identical and render() can reuse the previous clip. Values are
+        rounded at the same 3-decimal resolution the pixel paths use.
+
+        Args:
+            frame_idx: Integer frame index into the reaction tables
+
+        Returns:
+            Hashable key tuple, or None when no tables are available
+        """
+        if not self._reaction_frames:
+            return None
+        parts = []
+        for reaction_type in sorted(self._reaction_frames):
+            series = self._reaction_frames[reaction_type]
+            i = frame_idx if frame_idx < len(series) else len(series) - 1
+            parts.append(round(float(series[i]), 3))
+        if self._shake_offsets is not None:
+            i = (frame_idx if frame_idx < len(self._shake_offsets)
+                 else len(self._shake_offsets) - 1)
+            parts.extend(self._shake_offsets[i])
+        return tuple(parts)
     
-    def _create_frame_at_time(self, time: float, frame_duration: float, 
-                             video_fps: float, prev_values: Dict[str, Any]) -> Optional[ImageClip]:
+    def _position_at(self, time: float, video_fps: float,
+                     frame_idx: Optional[int] = None,
+                     base: Optional[Tuple[int, int]] = None) -> Tuple[int, int]:
+        """Resolve the element position including any position reaction
+
+        Args:
+            time: Time position in the video
+            video_fps: Video frames per second
+            frame_idx: Integer frame index into the reaction tables
+            base: Starting (x, y) for axes the reaction leaves alone
+                (e.g. the scale-centered position); defaults to
+                self.position
+
+        Returns:
+            (x, y) position for this frame
+        """
+        pos_x, pos_y = base if base is not None else self.position
+        reaction = self.reactions.get("position")
+        if reaction is None:
+            return pos_x, pos_y
+
+        movement_type = reaction["params"].get("type", "bounce")
+        intensity = reaction["params"].get("intensity", 10)  # pixels
+        value = self._get_reaction_value("position", time, video_fps, frame_idx)
+
+        # Different movement patterns
+        if movement_type == "bounce":
+            # Simple bounce effect based on audio value
+            offset_y = int(intensity * value)
+            pos_y = self.position[1] - offset_y
+        elif movement_type == "shake":
+            # Random shake with intensity based on audio
+            shake_amount = intensity * value
+            if self._shake_offsets is not None and frame_idx is not None:
+                if frame_idx >= len(self._shake_offsets):
+                    frame_idx_s = len(self._shake_offsets) - 1
+                else:
+                    frame_idx_s = frame_idx
+                unit_x, unit_y = self._shake_offsets[frame_idx_s]
+                offset_x = int(unit_x * shake_amount)
+                offset_y = int(unit_y * shake_amount)
+            else:
+                shake_amount = int(shake_amount)
+                offset_x = np.random.randint(-shake_amount, shake_amount+1)
+                offset_y = np.random.randint(-shake_amount, shake_amount+1)
+            pos_x = self.position[0] + offset_x
+            pos_y = self.position[1] + offset_y
+
+        return pos_x, pos_y
+
+    def _frame_array(self, frame_idx: int, time: float,
+                     video_fps: float) -> Optional[np.ndarray]:
+        """Return the RGBA pixels for one frame, if the size is fixed
+
+        Subclasses whose rendered frames share one size can implement
+        this to enable render_as_single_clip; the default opts out.
+
+        Args:
+            frame_idx: Integer frame index into the reaction tables
+            time: Time position in the video
+            video_fps: Video frames per second
+
+        Returns:
+            RGBA uint8 array, or None when unsupported
+        """
+        return None
+
+    def render_as_single_clip(self, video_fps: float,
+                              total_duration: float) -> Optional[VideoClip]:
+        """Render as one lazy VideoClip instead of per-frame clips
+
+        A reactive element otherwise becomes thousands of one-frame
+        ImageClips that the compositor must track individually. When
+        the frame size is fixed, a single VideoClip can pull pixels
+        from the cached per-frame arrays on demand, with the position
+        reaction expressed as a time function.
+
+        Args:
+            video_fps: Frames per second of the base video
+            total_duration: Total duration of the video in seconds
+
+        Returns:
+            The composed clip, or None when the element changes size
+            over time (a VideoClip has one fixed frame size) or has no
+            audio features
+        """
+        if not self.audio_features or "scale" in self.reactions:
+            return None
+
+        n_frames = int(np.ceil(total_duration * video_fps))
+        self.precompute_reactions(n_frames, video_fps)
+        if self._frame_array(0, 0.0, video_fps) is None:
+            return None
+
+        def clamp(t):
+            i = int(t * video_fps)
+            return i if i < n_frames else n_frames - 1
+
+        def frame_function(t):
+            i = clamp(t)
+            return self._frame_array(i, i / video_fps, video_fps)[..., :3]
+
+        def mask_function(t):
+            i = clamp(t)
+            rgba = self._frame_array(i, i / video_fps, video_fps)
+            return rgba[..., 3] / 255.0
+
+        clip = VideoClip(frame_function, duration=total_duration)
+        mask = VideoClip(mask_function, duration=total_duration, is_mask=True)
+        clip = clip.with_mask(mask)
+
+        if "position" in self.reactions:
+            def position_function(t):
+                i = clamp(t)
+                return self._position_at(i / video_fps, video_fps, i)
+            return clip.with_position(position_function)
+        return clip.with_position(self.position)
+
+    def _create_frame_at_time(self, time: float, frame_duration: float,
+                             video_fps: float,
+                             frame_idx: Optional[int] = None) -> Optional[ImageClip]:
         """Create a single frame with all reactions applied at the given time
         
         Args:
             time: Time position in the video
             frame_duration: Duration of a single frame
             video_fps: Video frames per second
-            prev_values: Previous reaction values for smoothing
+            frame_idx: Integer frame index when called from render;
+                indexes the precomputed reaction tables directly
             
         Returns:
             ImageClip for this frame, or None if creation failed
@@ -111,6 +333,158 @@ class Element:
             return curr_value
         return prev_value + smoothing_factor * (curr_value - prev_value)
 
+    def _reaction_range(self, reaction_type: str, params: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+        """Get the (min, max) output range for a reaction, if it has one
+
+        Args:
+            reaction_type: Type of reaction ("scale", "opacity", etc.)
+            params: The reaction's parameters
+
+        Returns:
+            (min, max) tuple for range-mapped reactions, or None for
+            reactions that consume the raw feature value (position,
+            color maps)
+        """
+        if reaction_type == "scale":
+            return params.get("min_scale", 1.0), params.get("max_scale", 1.5)
+        if reaction_type == "opacity":
+            default_min, default_max = self._OPACITY_DEFAULTS
+            return (params.get("min_opacity", default_min),
+                    params.get("max_opacity", default_max))
+        if reaction_type == "color" and "color_map" not in params:
+            return params.get("min_value", 0.5), params.get("max_value", 1.5)
+        return None
+
+    def precompute_reactions(self, n_frames: int, video_fps: float):
+        """Evaluate all reactions for every frame in one vectorized pass
+
+        Builds per-reaction arrays of length n_frames so that the
+        per-frame rendering path only needs an integer index lookup
+        instead of a feature fetch, range mapping and smoothing per call.
+
+        Args:
+            n_frames: Number of video frames to evaluate
+            video_fps: Frames per second of the base video
+        """
+        self._reaction_frames = {}
+
+        # One batched RNG draw covers every shake frame; the unit
+        # offsets are scaled by the per-frame amplitude at lookup time.
+        # An optional "seed" param makes the shake reproducible.
+        self._shake_offsets = None
+        position_reaction = self.reactions.get("position")
+        if (position_reaction is not None
+                and position_reaction["params"].get("type", "bounce") == "shake"):
+            rng = np.random.default_rng(position_reaction["params"].get("seed"))
+            self._shake_offsets = rng.uniform(-1.0, 1.0, size=(n_frames, 2))
+
+        for reaction_type, reaction in self.reactions.items():
+            series = self._frame_feature_series(
+                reaction["feature"], n_frames, video_fps
+            )
+
+            value_range = self._reaction_range(reaction_type, reaction["params"])
+            if value_range is not None:
+                min_value, max_value = value_range
+                smoothing = reaction["params"].get("smoothing", 0.3)
+                if _NUMBA_AVAILABLE and len(series) > _NUMBA_THRESHOLD:
+                    # One fused pass instead of a mapping pass plus a
+                    # smoothing pass over the same memory
+                    series = _map_smooth_numba(
+                        series, float(min_value), float(max_value),
+                        float(smoothing)
+                    )
+                else:
+                    series = min_value + series * (max_value - min_value)
+                    series = self._smooth_series(series, smoothing)
+
+            # Reaction values have a small dynamic range (scales around
+            # 1, opacities in [0, 1], normalized features), so half
+            # precision halves the table footprint at no visible cost
+            self._reaction_frames[reaction_type] = series.astype(np.float16)
+
+    def _frame_feature_series(self, feature: str, n_frames: int, video_fps: float) -> np.ndarray:
+        """Build the per-frame series of an audio feature
+
+        Args:
+            feature: Feature name
+            n_frames: Number of video frames
+            video_fps: Frames per second of the base video
+
+        Returns:
+            Array of length n_frames with the feature value at each frame
+        """
+        if not self.audio_features or feature not in self.audio_features:
+            logger.warning(f"Audio feature {feature} not available. Using default value.")
+            return np.full(n_frames, 0.5)
+
+        values = np.asarray(self.audio_features[feature])
+        indices = np.minimum(np.arange(n_frames), len(values) - 1)
+        return values[indices].astype(np.float64)
+
+    @staticmethod
+    def _smooth_series(values: np.ndarray, smoothing_factor: float = 0.3) -> np.ndarray:
+        """Apply the first-order smoothing filter over a whole series
+
+        The smoothing y[i] = y[i-1] + a*(x[i] - y[i-1]) is a first-order
+        IIR filter, so scipy runs it over the whole series in one C
+        call; the initial condition reproduces y[0] = x[0].
+
+        Args:
+            values: Raw per-frame values
+            smoothing_factor: Amount of smoothing (0-1)
+
+        Returns:
+            Smoothed series of the same length
+        """
+        if len(values) == 0:
+            return values
+        if _SCIPY_AVAILABLE:
+            b = [smoothing_factor]
+            a = [1.0, smoothing_factor - 1.0]
+            zi = [(1.0 - smoothing_factor) * values[0]]
+            smoothed, _ = _lfilter(b, a, values, zi=zi)
+            return smoothed
+        smoothed = np.empty_like(values)
+        prev = values[0]
+        for i, value in enumerate(values):
+            prev = prev + smoothing_factor * (value - prev)
+            smoothed[i] = prev
+        return smoothed
+
+    def _get_reaction_value(self, reaction_type: str, time: float,
+                            video_fps: float,
+                            frame_idx: Optional[int] = None) -> float:
+        """Look up the precomputed reaction value at a given time
+
+        Args:
+            reaction_type: Type of reaction ("scale", "opacity", etc.)
+            time: Time in seconds
+            video_fps: Video frames per second
+            frame_idx: Precomputed integer frame index; when given, the
+                time-to-index conversion is skipped entirely
+
+        Returns:
+            The precomputed (mapped and smoothed) reaction value
+        """
+        if self._reaction_frames is None or reaction_type not in self._reaction_frames:
+            # Not precomputed (e.g. direct call outside render); fall back
+            # to an unsmoothed evaluation at this time
+            reaction = self.reactions[reaction_type]
+            value = self._get_feature_value_at_time(reaction["feature"], time, video_fps)
+            value_range = self._reaction_range(reaction_type, reaction["params"])
+            if value_range is not None:
+                min_value, max_value = value_range
+                return min_value + value * (max_value - min_value)
+            return value
+
+        series = self._reaction_frames[reaction_type]
+        if frame_idx is None:
+            frame_idx = int(time * video_fps)
+        if frame_idx >= len(series):
+            frame_idx = len(series) - 1
+        return float(series[frame_idx])
+
     def _get_feature_value_at_time(self, feature: str, time: float, video_fps: float) -> float:
         """Get audio feature value at specific time
         
@@ -133,185 +507,346 @@ class Element:
 
 class LogoElement(Element):
     """Logo overlay element that can react to audio"""
-    
-    def __init__(self, logo_path: str, position: Tuple[int, int], 
-                base_size: Optional[Union[float, Tuple[int, int]]] = None):
+
+    _OPACITY_DEFAULTS = (0.3, 1.0)
+
+    # Maximum number of processed pixel arrays kept per element
+    _PROCESSED_CACHE_SIZE = 256
+
+    def __init__(self, logo_path: str, position: Tuple[int, int],
+                base_size: Optional[Union[float, Tuple[int, int]]] = None,
+                use_gpu: bool = False):
         """Initialize logo element
         
         Args:
             logo_path: Path to logo image file
             position: (x, y) position coordinates
             base_size: Base size as fraction of video or (width, height) tuple
+            use_gpu: Run the enhancement math on the GPU via CuPy when
+                it is installed; silently ignored otherwise
         """
+        if not os.path.exists(logo_path):
+            raise ValueError(f"Logo file not found: {logo_path}")
+
         self.logo_path = logo_path
         self.base_size = base_size
-        
+        self.use_gpu = use_gpu
+
         # Load original logo image
         logo_clip = ImageClip(logo_path)
-        
+
+        # Decode the logo once; per-frame rendering starts from this
+        # cached image instead of re-reading the file every frame
+        with Image.open(logo_path) as img:
+            self._base_pil = img.convert('RGBA').copy()
+
+        # Contiguous RGBA pixels for the OpenCV resize path
+        self._base_np = np.asarray(self._base_pil)
+
+        # Processed (resized/enhanced) pixels keyed by their rounded
+        # parameter tuple; see _processed_array
+        self._frame_cache = OrderedDict()
+
+        # Reusable intermediate buffers keyed by shape/dtype; a reactive
+        # logo oscillates over a small set of sizes, so these remove the
+        # per-frame alloc/free churn of the resize and enhancement
+        # intermediates
+        self._scratch_by_size: Dict[Tuple, np.ndarray] = {}
+
         super().__init__(logo_clip, position)
     
-    def _create_frame_at_time(self, time: float, frame_duration: float, 
-                             video_fps: float, prev_values: Dict[str, Any]) -> Optional[ImageClip]:
+    def _create_frame_at_time(self, time: float, frame_duration: float,
+                             video_fps: float,
+                             frame_idx: Optional[int] = None) -> Optional[ImageClip]:
         """Create a single logo frame with all reactions applied
         
         Args:
             time: Time position in the video
             frame_duration: Duration of a single frame
             video_fps: Video frames per second
-            prev_values: Previous reaction values for smoothing
+            frame_idx: Integer frame index into the reaction tables
             
         Returns:
             ImageClip for this frame
         """
-        try:
-            # Get the original logo image
-            logo_img = np.array(Image.open(self.logo_path))
-            
-            # Convert to PIL Image for processing
-            pil_img = Image.fromarray(logo_img)
-            
-            # Get base dimensions
-            width, height = self.original_size
-            pos_x, pos_y = self.position
-            
-            # Process different reaction types
-            modified = False
-            
-            # Scale reaction processing
-            if "scale" in self.reactions:
-                reaction = self.reactions["scale"]
-                feature = reaction["feature"]
-                intensity = reaction["params"].get("intensity", 0.3)
-                min_scale = reaction["params"].get("min_scale", 1.0)
-                max_scale = reaction["params"].get("max_scale", 1.5)
-                
-                value = self._get_feature_value_at_time(feature, time, video_fps)
-                scale_range = max_scale - min_scale
-                scale_factor = min_scale + (value * scale_range)
-                
-                # Apply smoothing
-                scale_factor = self._smooth_transition(
-                    scale_factor, 
-                    prev_values["scale"], 
-                    reaction["params"].get("smoothing", 0.3)
-                )
-                prev_values["scale"] = scale_factor
-                
-                # Calculate new dimensions
-                new_w = int(width * scale_factor)
-                new_h = int(height * scale_factor)
-                
-                # Resize image
-                pil_img = pil_img.resize((new_w, new_h), Image.LANCZOS)
-                
-                # Recalculate position to maintain center point
-                width_diff = int((new_w - width) / 2)
-                height_diff = int((new_h - height) / 2)
-                pos_x = self.position[0] - width_diff
-                pos_y = self.position[1] - height_diff
-                
-                modified = True
-            
-            # Opacity/brightness reaction processing
-            if "opacity" in self.reactions:
-                reaction = self.reactions["opacity"]
-                feature = reaction["feature"]
-                intensity = reaction["params"].get("intensity", 0.5)
-                min_opacity = reaction["params"].get("min_opacity", 0.3)
-                max_opacity = reaction["params"].get("max_opacity", 1.0)
-                
-                value = self._get_feature_value_at_time(feature, time, video_fps)
-                opacity_range = max_opacity - min_opacity
-                opacity = min_opacity + (value * opacity_range)
-                
-                # Apply smoothing
-                opacity = self._smooth_transition(
-                    opacity, 
-                    prev_values["opacity"], 
-                    reaction["params"].get("smoothing", 0.3)
-                )
-                prev_values["opacity"] = opacity
-                
-                # Enhance opacity (via brightness for PNG images with alpha)
-                enhancer = ImageEnhance.Brightness(pil_img)
-                pil_img = enhancer.enhance(opacity)
-                
-                modified = True
-                
-            # Color reaction processing (hue shift, saturation, etc.)
-            if "color" in self.reactions:
-                reaction = self.reactions["color"]
-                feature = reaction["feature"]
-                color_type = reaction["params"].get("type", "saturation")
-                min_value = reaction["params"].get("min_value", 0.5)
-                max_value = reaction["params"].get("max_value", 1.5)
-                
-                value = self._get_feature_value_at_time(feature, time, video_fps)
-                value_range = max_value - min_value
-                color_value = min_value + (value * value_range)
-                
-                # Apply smoothing
-                color_value = self._smooth_transition(
-                    color_value, 
-                    prev_values["color"], 
-                    reaction["params"].get("smoothing", 0.3)
-                )
-                prev_values["color"] = color_value
-                
-                # Apply color transformation based on type
-                if color_type == "saturation":
-                    enhancer = ImageEnhance.Color(pil_img)
-                    pil_img = enhancer.enhance(color_value)
-                elif color_type == "contrast":
-                    enhancer = ImageEnhance.Contrast(pil_img)
-                    pil_img = enhancer.enhance(color_value)
-                    
-                modified = True
-                
-            # Position reaction (bounce, shake, etc.) - advanced feature
-            if "position" in self.reactions:
-                reaction = self.reactions["position"]
-                feature = reaction["feature"]
-                movement_type = reaction["params"].get("type", "bounce")
-                intensity = reaction["params"].get("intensity", 10)  # pixels
-                
-                value = self._get_feature_value_at_time(feature, time, video_fps)
-                
-                # Different movement patterns
-                if movement_type == "bounce":
-                    # Simple bounce effect based on audio value
-                    offset_y = int(intensity * value)
-                    pos_y = self.position[1] - offset_y
-                elif movement_type == "shake":
-                    # Random shake with intensity based on audio
-                    shake_amount = int(intensity * value)
-                    offset_x = np.random.randint(-shake_amount, shake_amount+1)
-                    offset_y = np.random.randint(-shake_amount, shake_amount+1)
-                    pos_x = self.position[0] + offset_x
-                    pos_y = self.position[1] + offset_y
-                    
-                modified = True
-            
-            # Create ImageClip for this frame
-            if modified:
-                img_clip = ImageClip(np.array(pil_img))
-                img_clip = img_clip.with_duration(frame_duration)
-                img_clip = img_clip.with_position((pos_x, pos_y))
-                img_clip = img_clip.with_start(time)
-                return img_clip
+        # Get base dimensions
+        width, height = self.original_size
+        pos_x, pos_y = self.position
+
+        # Resolve the reaction parameters first; the pixel work is
+        # done (or fetched from cache) once they are known
+        modified = False
+        new_size = None
+        opacity_q = None
+        color_type = None
+        color_q = None
+
+        # Scale reaction processing
+        if "scale" in self.reactions:
+            scale_factor = self._get_reaction_value("scale", time, video_fps, frame_idx)
+
+            new_w = int(width * scale_factor)
+            new_h = int(height * scale_factor)
+            new_size = (new_w, new_h)
+
+            # Recalculate position to maintain center point
+            pos_x = self.position[0] - int((new_w - width) / 2)
+            pos_y = self.position[1] - int((new_h - height) / 2)
+
+            modified = True
+
+        # Opacity/brightness reaction processing
+        if "opacity" in self.reactions:
+            opacity_q = round(
+                self._get_reaction_value("opacity", time, video_fps, frame_idx), 3
+            )
+            modified = True
+
+        # Color reaction processing (hue shift, saturation, etc.)
+        if "color" in self.reactions:
+            color_type = self.reactions["color"]["params"].get("type", "saturation")
+            color_q = round(
+                self._get_reaction_value("color", time, video_fps, frame_idx), 3
+            )
+            modified = True
+
+        # Position reaction (bounce, shake, etc.)
+        if "position" in self.reactions:
+            pos_x, pos_y = self._position_at(
+                time, video_fps, frame_idx, base=(pos_x, pos_y)
+            )
+            modified = True
+
+        # Create ImageClip for this frame
+        if modified:
+            img_clip = ImageClip(
+                self._processed_array(new_size, opacity_q, color_type, color_q)
+            )
+            img_clip = img_clip.with_duration(frame_duration)
+            img_clip = img_clip.with_position((pos_x, pos_y))
+            img_clip = img_clip.with_start(time)
+            return img_clip
+        else:
+            # If no modifications, return a simple clip with the original image
+            return self.clip.with_position(self.position).with_start(time).with_duration(frame_duration)
+
+    def _frame_array(self, frame_idx: int, time: float,
+                     video_fps: float) -> np.ndarray:
+        """Return the processed RGBA pixels for one fixed-size frame
+
+        Only called without a scale reaction, so every frame shares the
+        base size and the processed-frame cache absorbs repeats.
+
+        Args:
+            frame_idx: Integer frame index into the reaction tables
+            time: Time position in the video
+            video_fps: Video frames per second
+
+        Returns:
+            RGBA uint8 array for this frame
+        """
+        opacity_q = None
+        color_type = None
+        color_q = None
+        if "opacity" in self.reactions:
+            opacity_q = round(
+                self._get_reaction_value("opacity", time, video_fps, frame_idx), 3
+            )
+        if "color" in self.reactions:
+            color_type = self.reactions["color"]["params"].get("type", "saturation")
+            color_q = round(
+                self._get_reaction_value("color", time, video_fps, frame_idx), 3
+            )
+        return self._processed_array(None, opacity_q, color_type, color_q)
+
+    def _processed_array(self, new_size: Optional[Tuple[int, int]],
+                         opacity_q: Optional[float],
+                         color_type: Optional[str],
+                         color_q: Optional[float]) -> np.ndarray:
+        """Resize/enhance the cached logo once per distinct parameter tuple
+
+        Audio features change slower than the video FPS, so after
+        rounding, consecutive frames frequently resolve to identical
+        parameters; the processed pixels are cached under the rounded
+        key in a small LRU, skipping the LANCZOS resize (the heaviest
+        op per frame) on repeats.
+
+        Args:
+            new_size: Target (w, h), or None to keep the base size
+            opacity_q: Rounded brightness factor, or None
+            color_type: "saturation" or "contrast" when color_q is set
+            color_q: Rounded color enhancement factor, or None
+
+        Returns:
+            Processed RGBA pixels as a NumPy array
+        """
+        key = (new_size, opacity_q, color_type, color_q)
+        cached = self._frame_cache.get(key)
+        if cached is not None:
+            self._frame_cache.move_to_end(key)
+            return cached
+
+        if new_size is None:
+            arr = self._base_np
+        elif _CV2_AVAILABLE:
+            # OpenCV's SIMD resize is several times faster than PIL
+            # LANCZOS and keeps the data as a contiguous uint8 array.
+            # When an enhancement pass follows, resize into a reusable
+            # scratch buffer: the enhancement writes its own fresh
+            # output, so the scratch never ends up in the cache
+            if opacity_q is not None or color_q is not None:
+                dst = self._scratch(new_size[1], new_size[0], np.uint8)
+                arr = cv2.resize(self._base_np, new_size, dst=dst,
+                                 interpolation=cv2.INTER_LINEAR)
             else:
-                # If no modifications, return a simple clip with the original image
-                return self.clip.with_position(self.position).with_start(time).with_duration(frame_duration)
-                
-        except Exception as e:
-            logger.error(f"Error creating logo frame at {time}s: {e}")
-            return None
+                arr = cv2.resize(self._base_np, new_size, interpolation=cv2.INTER_LINEAR)
+        else:
+            # asarray reads through PIL's array interface without
+            # copying the RGBA buffer; nothing downstream mutates it
+            arr = np.asarray(self._base_pil.resize(new_size, Image.LANCZOS))
+
+        if opacity_q is not None or color_q is not None:
+            arr = self._apply_color(
+                arr,
+                brightness=opacity_q,
+                saturation=color_q if color_type == "saturation" else None,
+                contrast=color_q if color_type == "contrast" else None,
+            )
+        self._frame_cache[key] = arr
+        if len(self._frame_cache) > self._PROCESSED_CACHE_SIZE:
+            self._frame_cache.popitem(last=False)
+        return arr
+
+    def _scratch(self, h: int, w: int, dtype, channels: int = 4) -> np.ndarray:
+        """Get (or allocate once) a reusable buffer for a shape/dtype
+
+        Args:
+            h: Buffer height in pixels
+            w: Buffer width in pixels
+            dtype: NumPy dtype of the buffer
+            channels: Number of channels
+
+        Returns:
+            Preallocated array; contents are undefined between calls
+        """
+        key = (h, w, np.dtype(dtype).char, channels)
+        buf = self._scratch_by_size.get(key)
+        if buf is None:
+            buf = self._scratch_by_size[key] = np.empty((h, w, channels), dtype)
+        return buf
+
+    def _apply_color(self, arr: np.ndarray,
+                     brightness: Optional[float] = None,
+                     saturation: Optional[float] = None,
+                     contrast: Optional[float] = None) -> np.ndarray:
+        """Apply the active enhancements in a single float32 pass
+
+        Chaining ImageEnhance operators walks the full image once per
+        operator and allocates an intermediate PIL image each time;
+        fusing them into one arithmetic pass touches the pixels once.
+        Matches ImageEnhance semantics: the alpha channel is preserved
+        and the blend runs against the ITU-R 601-2 luma.
+
+        Args:
+            arr: RGBA uint8 pixel array (not modified)
+            brightness: Brightness factor, or None to skip
+            saturation: Color factor, or None to skip
+            contrast: Contrast factor, or None to skip
+
+        Returns:
+            New RGBA uint8 array with the enhancements applied; only the
+            float32 intermediate comes from the scratch pool
+        """
+        if self.use_gpu and _CUPY_AVAILABLE:
+            return self._apply_color_gpu(arr, brightness, saturation, contrast)
+
+        h, w = arr.shape[:2]
+        out = np.empty_like(arr)
+
+        # PIL pivots contrast on the global luma mean, so that needs
+        # one reduction before the tiled loop; channel means and the
+        # luma dot product commute, so only three scalars are averaged
+        mean = None
+        if contrast is not None:
+            channel_means = arr[..., :3].reshape(-1, 3).mean(axis=0)
+            mean = float(int(channel_means @ _LUMA_WEIGHTS + 0.5))
+
+        # Work in row panels small enough to stay in L2 across all the
+        # arithmetic steps (float32 RGB panel plus the uint8 source)
+        panel_rows = max(1, _PANEL_BYTES // (w * 16))
+        rgb_panel = self._scratch(panel_rows, w, np.float32, 3)
+        for y in range(0, h, panel_rows):
+            src = arr[y:y + panel_rows]
+            rgb = rgb_panel[:src.shape[0]]
+            rgb[...] = src[..., :3]
+            if saturation is not None:
+                gray_px = (rgb @ _LUMA_WEIGHTS)[..., np.newaxis]
+                rgb -= gray_px
+                rgb *= saturation
+                rgb += gray_px
+            if contrast is not None:
+                rgb -= mean
+                rgb *= contrast
+                rgb += mean
+            if brightness is not None:
+                rgb *= brightness
+            np.clip(rgb, 0.0, 255.0, out=rgb)
+            out[y:y + panel_rows, :, :3] = rgb
+            out[y:y + panel_rows, :, 3] = src[..., 3]
+        return out
+
+    def _apply_color_gpu(self, arr: np.ndarray,
+                         brightness: Optional[float],
+                         saturation: Optional[float],
+                         contrast: Optional[float]) -> np.ndarray:
+        """CuPy variant of the fused enhancement pass
+
+        Same math as the CPU path but element-wise on the device; the
+        processed-frame cache means only distinct parameter tuples pay
+        the upload/download round trip.
+
+        Args:
+            arr: RGBA uint8 pixel array (not modified)
+            brightness: Brightness factor, or None to skip
+            saturation: Color factor, or None to skip
+            contrast: Contrast factor, or None to skip
+
+        Returns:
+            New RGBA uint8 array with the enhancements applied
+        """
+        rgb = cp.asarray(arr[..., :3]).astype(cp.float32)
+        if saturation is not None or contrast is not None:
+            gray = rgb @ cp.asarray(_LUMA_WEIGHTS)
+        if saturation is not None:
+            gray_px = gray[..., cp.newaxis]
+            rgb -= gray_px
+            rgb *= saturation
+            rgb += gray_px
+        if contrast is not None:
+            mean = float(int(float(gray.mean()) + 0.5))
+            rgb -= mean
+            rgb *= contrast
+            rgb += mean
+        if brightness is not None:
+            rgb *= brightness
+        cp.clip(rgb, 0.0, 255.0, out=rgb)
+
+        out = np.empty_like(arr)
+        out[..., :3] = cp.asnumpy(rgb.astype(cp.uint8))
+        out[..., 3] = arr[..., 3]
+        return out
 
 
 class TextElement(Element):
     """Text overlay element that can react to audio"""
-    
+
+    # Maximum number of rasterized TextClips kept per element
+    _TEXTCLIP_CACHE_SIZE = 128
+
+    # Entries in the quantized color-map LUT; 8-bit channels cannot
+    # resolve finer steps than this anyway
+    _COLOR_LUT_SIZE = 256
+
     def __init__(self, text: str, position: Tuple[int, int], 
                 fontsize: int = 30, color: str = 'white', 
                 font_path: Optional[str] = None):
@@ -341,149 +876,183 @@ class TextElement(Element):
             
         # Create base text clip
         text_clip = TextClip(**self.text_kwargs)
-        
+
+        # Quantized color-map LUT (hex strings) and per-frame uint8
+        # indices into it, built by precompute_reactions when a
+        # color_map reaction is active
+        self._color_lut = None
+        self._color_idx = None
+
+        # Rasterized clips keyed by (font_size, color); the text and
+        # font never change per element, and slow-moving reactions
+        # produce few distinct keys, so most frames skip the rasterizer
+        self._textclip_cache = OrderedDict()
+
         super().__init__(text_clip, position)
+
+    def precompute_reactions(self, n_frames: int, video_fps: float):
+        """Evaluate reactions and bulk-interpolate the color map
+
+        Extends the base precomputation by resolving the color reaction
+        up front: the color_map stops are parsed a single time into a
+        256-entry hex LUT, and the feature series is quantized into
+        uint8 indices, replacing the per-frame segment search and hex
+        parsing with one array lookup.
+
+        Args:
+            n_frames: Number of video frames to evaluate
+            video_fps: Frames per second of the base video
+        """
+        super().precompute_reactions(n_frames, video_fps)
+        self._color_lut = None
+        self._color_idx = None
+
+        if "color" not in self.reactions:
+            return
+
+        params = self.reactions["color"]["params"]
+        color_map = params.get("color_map", [(0, "white"), (1, "red")])
+        series = self._reaction_frames["color"].astype(np.float64)
+
+        stops = np.array([stop for stop, _ in color_map], dtype=np.float64)
+        rgbs = np.array([self._parse_color(c) for _, c in color_map],
+                        dtype=np.float64)
+        low, high = float(stops[0]), float(stops[-1])
+        lut_inputs = np.linspace(low, high, self._COLOR_LUT_SIZE)
+        rgb = np.stack(
+            [np.interp(lut_inputs, stops, rgbs[:, c]) for c in range(3)],
+            axis=1,
+        ).astype(np.uint8)
+        self._color_lut = [f'#{r:02x}{g:02x}{b:02x}' for r, g, b in rgb]
+
+        span = high - low if high > low else 1.0
+        normalized = np.clip((series - low) / span, 0.0, 1.0)
+        self._color_idx = np.rint(
+            normalized * (self._COLOR_LUT_SIZE - 1)
+        ).astype(np.uint8)
     
-    def _create_frame_at_time(self, time: float, frame_duration: float, 
-                             video_fps: float, prev_values: Dict[str, Any]) -> Optional[TextClip]:
+    def _create_frame_at_time(self, time: float, frame_duration: float,
+                             video_fps: float,
+                             frame_idx: Optional[int] = None) -> Optional[TextClip]:
         """Create a single text frame with all reactions applied
         
         Args:
             time: Time position in the video
             frame_duration: Duration of a single frame
             video_fps: Video frames per second
-            prev_values: Previous reaction values for smoothing
+            frame_idx: Integer frame index into the reaction tables
             
         Returns:
             TextClip for this frame
         """
-        try:
-            # Start with base text properties
-            kwargs = self.text_kwargs.copy()
-            pos_x, pos_y = self.position
-            base_width, base_height = self.original_size
-            color = self.color
-            modified = False
-            
-            # Font size reaction
-            if "scale" in self.reactions:
-                reaction = self.reactions["scale"]
-                feature = reaction["feature"]
-                min_scale = reaction["params"].get("min_scale", 1.0)
-                max_scale = reaction["params"].get("max_scale", 1.5)
-                
-                value = self._get_feature_value_at_time(feature, time, video_fps)
-                scale_range = max_scale - min_scale
-                scale_factor = min_scale + (value * scale_range)
-                
-                # Apply smoothing
-                scale_factor = self._smooth_transition(
-                    scale_factor, 
-                    prev_values["scale"], 
-                    reaction["params"].get("smoothing", 0.3)
-                )
-                prev_values["scale"] = scale_factor
-                
-                # Set new fontsize
-                kwargs['font_size'] = int(self.fontsize * scale_factor)
-                modified = True
-            
-            # Color reaction (color shift based on audio)
-            if "color" in self.reactions:
+        # Start with base text properties
+        kwargs = self.text_kwargs.copy()
+        pos_x, pos_y = self.position
+        base_width, base_height = self.original_size
+        color = self.color
+        modified = False
+        
+        # Font size reaction
+        if "scale" in self.reactions:
+            scale_factor = self._get_reaction_value("scale", time, video_fps, frame_idx)
+
+            # Set new fontsize
+            kwargs['font_size'] = int(self.fontsize * scale_factor)
+            modified = True
+        
+        # Color reaction (color shift based on audio)
+        if "color" in self.reactions:
+            if self._color_lut is not None and frame_idx is not None:
+                # LUT built in precompute_reactions
+                if frame_idx >= len(self._color_idx):
+                    frame_idx_c = len(self._color_idx) - 1
+                else:
+                    frame_idx_c = frame_idx
+                color = self._color_lut[self._color_idx[frame_idx_c]]
+            else:
                 reaction = self.reactions["color"]
-                feature = reaction["feature"]
                 color_map = reaction["params"].get("color_map", [(0, "white"), (1, "red")])
-                
-                value = self._get_feature_value_at_time(feature, time, video_fps)
-                
+
+                value = self._get_reaction_value("color", time, video_fps, frame_idx)
+
                 # Find which color range we're in
                 for i in range(len(color_map) - 1):
                     low_val, low_color = color_map[i]
                     high_val, high_color = color_map[i + 1]
-                    
+
                     if low_val <= value <= high_val:
                         # Interpolate between colors
                         ratio = (value - low_val) / (high_val - low_val) if high_val > low_val else 0
                         color = self._interpolate_color(low_color, high_color, ratio)
                         break
-                
-                kwargs['color'] = color
-                modified = True
-                
-            # Opacity reaction
-            opacity = 1.0
-            if "opacity" in self.reactions:
-                reaction = self.reactions["opacity"]
-                feature = reaction["feature"]
-                min_opacity = reaction["params"].get("min_opacity", 0.0)
-                max_opacity = reaction["params"].get("max_opacity", 1.0)
-                
-                value = self._get_feature_value_at_time(feature, time, video_fps)
-                opacity_range = max_opacity - min_opacity
-                opacity = min_opacity + (value * opacity_range)
-                
-                # Apply smoothing
-                opacity = self._smooth_transition(
-                    opacity, 
-                    prev_values["opacity"], 
-                    reaction["params"].get("smoothing", 0.3)
-                )
-                prev_values["opacity"] = opacity
-                modified = True
+
+            kwargs['color'] = color
+            modified = True
             
-            # Position reaction (bounce, shake, etc.)
-            if "position" in self.reactions:
-                reaction = self.reactions["position"]
-                feature = reaction["feature"]
-                movement_type = reaction["params"].get("type", "bounce")
-                intensity = reaction["params"].get("intensity", 10)  # pixels
-                
-                value = self._get_feature_value_at_time(feature, time, video_fps)
-                
-                # Different movement patterns
-                if movement_type == "bounce":
-                    # Simple bounce effect based on audio value
-                    offset_y = int(intensity * value)
-                    pos_y = self.position[1] - offset_y
-                elif movement_type == "shake":
-                    # Random shake with intensity based on audio
-                    shake_amount = int(intensity * value)
-                    offset_x = np.random.randint(-shake_amount, shake_amount+1)
-                    offset_y = np.random.randint(-shake_amount, shake_amount+1)
-                    pos_x = self.position[0] + offset_x
-                    pos_y = self.position[1] + offset_y
-                    
-                modified = True
-                
-            # Create the text clip for this frame
-            if modified:
-                frame_clip = TextClip(**kwargs)
-                frame_clip = frame_clip.with_duration(frame_duration)
-                
-                # Handle centering if size changed
-                if "scale" in self.reactions:
-                    new_width, new_height = frame_clip.size
-                    width_diff = int((new_width - base_width) / 2)
-                    height_diff = int((new_height - base_height) / 2)
-                    pos_x = self.position[0] - width_diff
-                    pos_y = self.position[1] - height_diff
-                
-                frame_clip = frame_clip.with_position((pos_x, pos_y))
-                frame_clip = frame_clip.with_start(time)
-                
-                # Apply opacity if needed
-                if "opacity" in self.reactions:
-                    frame_clip = frame_clip.with_opacity(opacity)
-                    
-                return frame_clip
+        # Opacity reaction
+        opacity = 1.0
+        if "opacity" in self.reactions:
+            opacity = self._get_reaction_value("opacity", time, video_fps, frame_idx)
+            modified = True
+        
+        # Position reaction (bounce, shake, etc.)
+        if "position" in self.reactions:
+            pos_x, pos_y = self._position_at(
+                time, video_fps, frame_idx, base=(pos_x, pos_y)
+            )
+            modified = True
+            
+        # Create the text clip for this frame
+        if modified:
+            cache_key = (kwargs['font_size'], kwargs['color'])
+            frame_clip = self._textclip_cache.get(cache_key)
+            if frame_clip is not None:
+                self._textclip_cache.move_to_end(cache_key)
             else:
-                # If no modifications, return the base clip with position and time
-                return self.clip.with_position(self.position).with_start(time).with_duration(frame_duration)
+                frame_clip = TextClip(**kwargs)
+                self._textclip_cache[cache_key] = frame_clip
+                if len(self._textclip_cache) > self._TEXTCLIP_CACHE_SIZE:
+                    old_key, old_clip = self._textclip_cache.popitem(last=False)
+                    old_clip.close()
+            # with_* methods return copies, so the cached clip
+            # itself is never mutated
+            frame_clip = frame_clip.with_duration(frame_duration)
+            
+            # Handle centering if size changed
+            if "scale" in self.reactions:
+                new_width, new_height = frame_clip.size
+                width_diff = int((new_width - base_width) / 2)
+                height_diff = int((new_height - base_height) / 2)
+                pos_x = self.position[0] - width_diff
+                pos_y = self.position[1] - height_diff
+            
+            frame_clip = frame_clip.with_position((pos_x, pos_y))
+            frame_clip = frame_clip.with_start(time)
+            
+            # Apply opacity if needed
+            if "opacity" in self.reactions:
+                frame_clip = frame_clip.with_opacity(opacity)
                 
-        except Exception as e:
-            logger.error(f"Error creating text frame at {time}s: {e}")
-            return None
+            return frame_clip
+        else:
+            # If no modifications, return the base clip with position and time
+            return self.clip.with_position(self.position).with_start(time).with_duration(frame_duration)
     
+    @staticmethod
+    def _parse_color(color: str) -> Tuple[int, int, int]:
+        """Parse a hex color string into an RGB tuple
+
+        Args:
+            color: Hex color like "#ff8800"; non-hex falls back to white
+
+        Returns:
+            (r, g, b) tuple of ints in 0-255
+        """
+        if color.startswith('#'):
+            packed = int(color[1:], 16)
+            return packed >> 16, (packed >> 8) & 0xff, packed & 0xff
+        return 255, 255, 255
+
     def _interpolate_color(self, color1: str, color2: str, ratio: float) -> str:
         """Interpolate between two colors
         
@@ -497,25 +1066,15 @@ class TextElement(Element):
         """
         # Convert named colors to RGB values
         # This is a simplified version - would need color name mapping for full support
-        if color1.startswith('#'):
-            r1, g1, b1 = int(color1[1:3], 16), int(color1[3:5], 16), int(color1[5:7], 16)
-        else:
-            # Default white if not hex
-            r1, g1, b1 = 255, 255, 255
-            
-        if color2.startswith('#'):
-            r2, g2, b2 = int(color2[1:3], 16), int(color2[3:5], 16), int(color2[5:7], 16)
-        else:
-            # Default white if not hex
-            r2, g2, b2 = 255, 255, 255
-        
-        # Interpolate RGB values
-        r = int(r1 + (r2 - r1) * ratio)
-        g = int(g1 + (g2 - g1) * ratio)
-        b = int(b1 + (b2 - b1) * ratio)
-        
-        # Return as hex string
-        return f'#{r:02x}{g:02x}{b:02x}'
+        r1, g1, b1 = self._parse_color(color1)
+        r2, g2, b2 = self._parse_color(color2)
+
+        # Interpolate the channels and pack back into one int; a single
+        # f-string format replaces the three per-channel ones
+        packed = ((int(r1 + (r2 - r1) * ratio) << 16)
+                  | (int(g1 + (g2 - g1) * ratio) << 8)
+                  | int(b1 + (b2 - b1) * ratio))
+        return f'#{packed:06x}'
 
 
 class ElementManager:
@@ -682,9 +1241,32 @@ class ElementManager:
         all_clips = []
         fps = self.base_video.fps
         duration = self.base_video.duration
-        
+
+        # Elements render independently, so multi-element projects can
+        # overlap their numpy/PIL work (which releases the GIL) across
+        # threads; results are collected in submission order to keep
+        # the layering stable. Threads rather than processes: MoviePy
+        # clips hold closures and cannot be pickled to workers. Any
+        # pool failure falls back to the serial path.
+        if len(self.elements) > 1:
+            try:
+                workers = min(len(self.elements), os.cpu_count() or 1)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(element.render, fps, duration)
+                        for element in self.elements
+                    ]
+                    for future in futures:
+                        all_clips.extend(future.result())
+                return all_clips
+            except Exception as e:
+                logger.warning(
+                    f"Parallel element render failed ({e}); rendering serially"
+                )
+                all_clips = []
+
         for element in self.elements:
             element_clips = element.render(fps, duration)
             all_clips.extend(element_clips)
-            
+
         return all_clips
\ No newline at end of file
@@ -1,19 +1,166 @@
+import functools
 import os
 import logging
 import subprocess
+import threading
 
 logger = logging.getLogger(__name__)
 
+
+def _ffmpeg_binary():
+    """Resolve the FFmpeg executable, preferring the bundled one"""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_nvenc():
+    """Probe FFmpeg for NVENC support, once per interpreter
+
+    Spawning ffmpeg to list encoders costs hundreds of milliseconds,
+    so the result is cached for the lifetime of the process. Setting
+    AUDIOVISUALIZER_FORCE_CPU=1 skips the probe entirely.
+
+    Returns:
+        True when the h264_nvenc encoder is available
+    """
+    if os.environ.get("AUDIOVISUALIZER_FORCE_CPU") == "1":
+        logger.info("AUDIOVISUALIZER_FORCE_CPU set, skipping NVENC probe")
+        return False
+    try:
+        result = subprocess.run(
+            [_ffmpeg_binary(), "-hide_banner", "-encoders"],
+            capture_output=True, text=True, check=True
+        )
+    except Exception as e:
+        logger.warning(f"Could not check for NVENC: {e}")
+        return False
+    if "h264_nvenc" in result.stdout:
+        logger.info("NVIDIA GPU encoding available")
+        return True
+    logger.info("NVIDIA GPU encoding not available, using CPU")
+    return False
+
+
+# Quality ladders resolved once at module load so every export is a
+# single dict lookup and the rate-control numbers live in one place.
+# NVENC rows: (preset, legacy preset, bitrate, maxrate, bufsize);
+# CPU rows: (preset, bitrate)
+_NVENC_QUALITY = {
+    'speed': ('p1', 'fast', '6000k', '9000k', '12000k'),
+    'balanced': ('p4', 'medium', '10000k', '15000k', '20000k'),
+    'quality': ('p7', 'slow', '15000k', '22500k', '30000k'),
+}
+
+_CPU_QUALITY = {
+    'speed': ('veryfast', '6000k'),
+    'balanced': ('medium', '10000k'),
+    'quality': ('slow', '15000k'),
+}
+
+
 class VideoExporter:
     """Handles video export with various quality settings and hardware acceleration options"""
     
     def __init__(self):
         self.video = None
-        
+        self._ffmpeg_proc = None
+        self._ffmpeg_key = None
+
     def set_video(self, video):
         """Set the video to be exported"""
         self.video = video
-        
+
+    def _get_encoder(self, output_path, fps, size, codec):
+        """Get a persistent FFmpeg encoder process for raw frame input
+
+        The process is kept alive across export calls and only restarted
+        when the output target changes, so batch workflows don't pay the
+        codec setup/teardown cost per clip.
+
+        Parameters:
+        - output_path: Path the encoder writes to
+        - fps: Frame rate of the raw input
+        - size: (width, height) of the raw frames
+        - codec: Video codec name (e.g. 'libx264')
+
+        Returns:
+            The running subprocess.Popen encoder
+        """
+        key = (output_path, fps, size, codec)
+        if (self._ffmpeg_proc is not None
+                and self._ffmpeg_key == key
+                and self._ffmpeg_proc.poll() is None):
+            return self._ffmpeg_proc
+
+        self.close()
+        width, height = size
+        cmd = [
+            _ffmpeg_binary(), "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}",
+            "-r", str(fps),
+            "-i", "pipe:0",
+            "-an",
+            "-c:v", codec,
+            "-pix_fmt", "yuv420p",
+            "-threads", "0",
+            output_path,
+        ]
+        self._ffmpeg_proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self._ffmpeg_key = key
+        return self._ffmpeg_proc
+
+    def export_stream(self, output_path, fps=None, codec="libx264"):
+        """Export by streaming raw frames to a persistent FFmpeg encoder
+
+        Repeated calls with the same output target reuse the running
+        encoder process, appending frames to the same encode session.
+        Call close() (or let the overlay be garbage collected) to flush
+        and finalize the output file.
+
+        Parameters:
+        - output_path: Path to save the output video
+        - fps: Frame rate (if None, uses the same as source video)
+        - codec: Video codec to encode with
+        """
+        if not self.video:
+            logger.error("No video to export")
+            return None
+
+        if fps is None:
+            fps = self.video.fps
+
+        proc = self._get_encoder(output_path, fps, tuple(self.video.size), codec)
+        try:
+            for frame in self.video.iter_frames(fps=fps, dtype='uint8'):
+                proc.stdin.write(frame.tobytes())
+        except Exception as e:
+            logger.error(f"Streaming export failed: {e}")
+            self.close()
+        return self
+
+    def close(self):
+        """Flush and shut down the persistent encoder, if any"""
+        if self._ffmpeg_proc is not None:
+            try:
+                if self._ffmpeg_proc.stdin:
+                    self._ffmpeg_proc.stdin.close()
+                self._ffmpeg_proc.wait()
+            except Exception as e:
+                logger.warning(f"Error closing encoder process: {e}")
+            self._ffmpeg_proc = None
+            self._ffmpeg_key = None
+
     def export_gpu_optimized(self, output_path, quality='balanced'):
         """
         Try to use GPU acceleration but fall back to CPU if needed.
@@ -27,66 +174,66 @@ class VideoExporter:
             logger.error("No video to export")
             return None
             
-        # First, try to detect if we can use NVIDIA acceleration
-        try:
-            nvenc_available = False
-            # Check if NVENC is available
-            result = subprocess.run(
-                ["ffmpeg", "-hide_banner", "-encoders"],
-                capture_output=True, text=True, check=True
-            )
-            if "h264_nvenc" in result.stdout:
-                nvenc_available = True
-                logger.info("NVIDIA GPU encoding available")
-            else:
-                logger.info("NVIDIA GPU encoding not available, using CPU")
-        except Exception as e:
-            logger.warning(f"Could not check for NVENC: {e}")
-            nvenc_available = False
+        # First, check if we can use NVIDIA acceleration (cached probe)
+        nvenc_available = _detect_nvenc()
 
         # Map quality to preset
         if nvenc_available:
-            # NVENC presets
-            if quality == 'speed':
-                preset = 'fast'  # More compatible than p7
-                bitrate = '6000k'
-            elif quality == 'quality':
-                preset = 'slow'  # More compatible than p1
-                bitrate = '15000k'
-            else:  # balanced
-                preset = 'medium'  # More compatible than p2
-                bitrate = '10000k'
-
-            # Try GPU export with simpler parameters
-            try:
-                logger.info("Exporting with GPU acceleration...")
-                self.video.write_videofile(
-                    output_path,
-                    codec="h264_nvenc",
-                    preset=preset,
-                    bitrate=bitrate,
-                    audio_codec="aac",
-                    audio_bitrate="192k",
-                    ffmpeg_params=["-pix_fmt", "yuv420p"],
-                    threads=4
-                )
-                logger.info(f"GPU-accelerated video exported to {output_path}")
-                return self
-            except Exception as e:
-                logger.warning(f"GPU export failed: {e}")
-                logger.info("Falling back to CPU encoding...")
+            # Modern NVENC tunes the p1-p7 scale; the legacy names
+            # still work but miss the per-preset rate-distortion
+            # tables, so they only serve as fallback for old drivers
+            preset, legacy_preset, bitrate, maxrate, bufsize = (
+                _NVENC_QUALITY.get(quality, _NVENC_QUALITY['balanced'])
+            )
+
+            # The preset goes through ffmpeg_params (not the preset=
+            # kwarg) so the companion flags travel with it. The first
+            # attempt keeps frames in VRAM after the initial upload:
+            # hwupload_cuda + scale_npp do the yuv420p conversion on
+            # the GPU instead of a swscale pass per frame (the -hwaccel
+            # decode flags don't apply here because moviepy pipes raw
+            # frames). Builds without NPP drop to a plain p-preset
+            # attempt, then to the legacy name for old drivers
+            # B-frames with middle reference mode plus lookahead and
+            # adaptive quantization recover the ~20% compression
+            # efficiency NVENC leaves on the table with its IPPP
+            # default; Pascal and older reject b_ref_mode/temporal AQ,
+            # so a bare attempt follows before the legacy fallback
+            quality_flags = [
+                "-bf", "3", "-b_ref_mode", "middle", "-refs", "3",
+                "-rc-lookahead", "20", "-spatial_aq", "1",
+                "-temporal_aq", "1",
+                "-maxrate", maxrate, "-bufsize", bufsize,
+            ]
+            attempts = (
+                ["-vf", "hwupload_cuda,scale_npp=format=yuv420p",
+                 "-preset", preset, "-tune", "hq"] + quality_flags,
+                ["-pix_fmt", "yuv420p", "-preset", preset, "-tune", "hq"]
+                + quality_flags,
+                ["-pix_fmt", "yuv420p", "-preset", preset, "-tune", "hq"],
+                ["-pix_fmt", "yuv420p", "-preset", legacy_preset],
+            )
+            for ffmpeg_params in attempts:
+                try:
+                    logger.info("Exporting with GPU acceleration...")
+                    self.video.write_videofile(
+                        output_path,
+                        codec="h264_nvenc",
+                        bitrate=bitrate,
+                        audio_codec="aac",
+                        audio_bitrate="192k",
+                        ffmpeg_params=ffmpeg_params,
+                        threads=4
+                    )
+                    logger.info(f"GPU-accelerated video exported to {output_path}")
+                    return self
+                except Exception as e:
+                    logger.warning(f"GPU export failed: {e}")
+            logger.info("Falling back to CPU encoding...")
 
         # If we get here, either NVENC wasn't available or it failed
         # CPU encoding fallback
-        if quality == 'speed':
-            preset = 'veryfast'
-            bitrate = '6000k'
-        elif quality == 'quality':
-            preset = 'slow'
-            bitrate = '15000k'
-        else:  # balanced
-            preset = 'medium'
-            bitrate = '10000k'
+        preset, bitrate = _CPU_QUALITY.get(quality, _CPU_QUALITY['balanced'])
 
         try:
             logger.info("Exporting with CPU encoding...")
@@ -107,6 +254,173 @@ class VideoExporter:
 
         return self
     
+    def _write_videofile_fast(self, output_path, fps, codec="libx264",
+                              ffmpeg_params=None, bitrate="8000k"):
+        """Export by piping raw frames straight into one ffmpeg process
+
+        moviepy's write_videofile allocates Python objects per frame and
+        funnels everything through its own writer; piping rawvideo into
+        a single ffmpeg process keeps the per-frame cost at one stdin
+        write. While frames stream, a background thread renders the
+        audio track to a temporary WAV, which a quick stream-copy mux
+        then combines with the encoded video.
+
+        Parameters:
+        - output_path: Path to save the output video
+        - fps: Frame rate to render at
+        - codec: Video codec to encode with
+        - ffmpeg_params: Extra output arguments for the encode pass
+        - bitrate: Target video bitrate
+        """
+        width, height = self.video.size
+        audio = getattr(self.video, 'audio', None)
+
+        audio_path = None
+        audio_thread = None
+        if audio is not None:
+            audio_path = output_path + ".temp_audio.wav"
+            audio_thread = threading.Thread(
+                target=audio.write_audiofile,
+                args=(audio_path,),
+                kwargs={'logger': None},
+            )
+            audio_thread.start()
+
+        video_target = (output_path if audio is None
+                        else output_path + ".temp_video"
+                        + os.path.splitext(output_path)[1])
+        cmd = [
+            _ffmpeg_binary(), "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}",
+            "-r", str(fps),
+            "-i", "pipe:0",
+            "-an",
+            "-c:v", codec,
+            "-b:v", bitrate,
+        ] + (ffmpeg_params or ["-pix_fmt", "yuv420p"]) + [
+            "-threads", "0",
+            video_target,
+        ]
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for frame in self.video.iter_frames(fps=fps, dtype='uint8'):
+                proc.stdin.write(frame.tobytes())
+        finally:
+            proc.stdin.close()
+            returncode = proc.wait()
+            if audio_thread is not None:
+                audio_thread.join()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with status {returncode}")
+
+        if audio is not None:
+            # Stream-copy the video so the mux pass is I/O bound only
+            subprocess.run(
+                [
+                    _ffmpeg_binary(), "-y",
+                    "-i", video_target,
+                    "-i", audio_path,
+                    "-c:v", "copy",
+                    "-c:a", "aac",
+                    "-b:a", "192k",
+                    output_path,
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+            )
+            os.remove(video_target)
+            os.remove(audio_path)
+        return self
+
+    def export_ladder(self, outputs, fps=None):
+        """Export several resolution rungs from one ffmpeg invocation
+
+        Producing 240p/480p/720p/1080p derivatives with separate export
+        calls re-renders and re-pipes the source once per rung. This
+        builds a single ffmpeg command with one output block per rung,
+        so the Python frame iteration and the raw-frame pipe happen
+        once and only the encodes multiply. With NVENC available the
+        scaling runs on the GPU via scale_npp, amortizing the single
+        upload across all encoder sessions.
+
+        Parameters:
+        - outputs: List of dicts, each with 'path' plus optional
+          'height' (source height when omitted) and 'bitrate'
+          (default '8000k')
+        - fps: Frame rate (if None, uses the same as source video)
+
+        Returns:
+            self, or None when there is nothing to export
+        """
+        if not self.video:
+            logger.error("No video to export")
+            return None
+        if not outputs:
+            logger.error("No ladder outputs given")
+            return None
+
+        if fps is None:
+            fps = self.video.fps
+        width, height = self.video.size
+        nvenc = _detect_nvenc()
+
+        cmd = [
+            _ffmpeg_binary(), "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}",
+            "-r", str(fps),
+            "-i", "pipe:0",
+        ]
+        for spec in outputs:
+            out_height = spec.get('height')
+            bitrate = spec.get('bitrate', '8000k')
+            if nvenc:
+                stages = ["hwupload_cuda"]
+                if out_height:
+                    stages.append(f"scale_npp=-2:{out_height}:format=yuv420p")
+                else:
+                    stages.append("scale_npp=format=yuv420p")
+                codec_args = ["-c:v", "h264_nvenc", "-preset", "p4"]
+            else:
+                stages = []
+                if out_height:
+                    stages.append(f"scale=-2:{out_height}")
+                stages.append("format=yuv420p")
+                codec_args = ["-c:v", "libx264", "-preset", "medium"]
+            cmd += (
+                ["-map", "0:v", "-vf", ",".join(stages)]
+                + codec_args
+                + ["-b:v", bitrate, "-an", spec['path']]
+            )
+
+        logger.info(f"Exporting {len(outputs)}-rung ladder...")
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            for frame in self.video.iter_frames(fps=fps, dtype='uint8'):
+                proc.stdin.write(frame.tobytes())
+        finally:
+            proc.stdin.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            logger.error(f"Ladder export failed (ffmpeg status {returncode})")
+        else:
+            logger.info(f"Ladder exported to {len(outputs)} outputs")
+        return self
+
     def export(self, output_path, fps=None):
         """
         Simple and reliable export method that works on all systems.
@@ -124,6 +438,16 @@ class VideoExporter:
 
         logger.info(f"Exporting video to {output_path}...")
 
+        # The direct pipe avoids moviepy's per-frame writer overhead;
+        # its failure modes (missing codec, broken pipe) fall back to
+        # the battle-tested moviepy path below
+        try:
+            self._write_videofile_fast(output_path, fps)
+            logger.info(f"Video successfully exported to {output_path}")
+            return self
+        except Exception as e:
+            logger.warning(f"Fast export failed ({e}); using moviepy writer")
+
         # Use the simplest possible parameters to ensure compatibility
         try:
             self.video.write_videofile(
@@ -1,6 +1,8 @@
 import unittest
 import os
 import tempfile
+import numpy as np
+from moviepy.video.VideoClip import ColorClip, ImageClip
 from audiovisualizer import AudioVisualOverlay
 
 class TestAudioVisualOverlay(unittest.TestCase):
@@ -16,6 +18,26 @@ class TestAudioVisualOverlay(unittest.TestCase):
         self.assertIsNotNone(overlay.audio_feature_extractor)
         self.assertIsNotNone(overlay.exporter)
     
+    def test_composite_get_frame(self):
+        """Compositing blits an overlay into the base frame"""
+        overlay = AudioVisualOverlay()
+        base = ColorClip(size=(64, 48), color=(10, 20, 30), duration=1.0).with_fps(10)
+        element = (
+            ImageClip(np.full((8, 8, 3), 255, dtype=np.uint8))
+            .with_position((4, 4))
+            .with_duration(1.0)
+        )
+
+        composite = overlay._composite_clips(base, [element])
+        frame = composite.get_frame(0.5)
+
+        self.assertEqual(frame.shape, (48, 64, 3))
+        # Overlay rect is the white element, the rest is the base color
+        self.assertTrue((frame[4:12, 4:12] == 255).all())
+        self.assertTrue((frame[0, 0] == (10, 20, 30)).all())
+        # Pulling the same frame again serves it from the LRU cache
+        self.assertTrue(np.array_equal(composite.get_frame(0.5), frame))
+
     # Add more tests here when you have sample media files available
     # For example:
     
@@ -0,0 +1,248 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from PIL import Image
+from audiovisualizer import effects
+from audiovisualizer.effects import (
+    EffectChain,
+    LogoOverlayEffect,
+    TextOverlayEffect,
+    SpectrumVisualizerEffect,
+    create_effect,
+    effect_from_dict,
+    write_filter_script,
+)
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), '..', 'logo.png')
+
+
+def make_sync_data(n_frames=30):
+    return {
+        'n_frames': n_frames,
+        'fps': 30.0,
+        'features': {
+            'rms': np.linspace(0.0, 1.0, n_frames),
+            'freq_bands': {'bass': np.full(n_frames, 0.5)},
+        },
+    }
+
+
+class TestBaseEffect(unittest.TestCase):
+    """Test feature resolution shared by all effects"""
+
+    def test_get_feature_data_simple_path(self):
+        effect = TextOverlayEffect("hi").set_audio_feature('rms')
+        data = effect.get_feature_data(make_sync_data())
+        self.assertEqual(len(data), 30)
+        self.assertAlmostEqual(float(data[-1]), 1.0)
+
+    def test_get_feature_data_nested_path(self):
+        effect = TextOverlayEffect("hi").set_audio_feature('freq_bands.bass')
+        data = effect.get_feature_data(make_sync_data())
+        self.assertAlmostEqual(float(data[0]), 0.5)
+
+    def test_get_feature_data_escaped_dot_path(self):
+        sync = make_sync_data()
+        sync['features']['freq_bands']['bass.low'] = np.full(30, 0.25)
+        effect = TextOverlayEffect("hi")
+        effect.set_audio_feature('freq_bands.bass\\.low')
+        data = effect.get_feature_data(sync)
+        self.assertAlmostEqual(float(data[0]), 0.25)
+
+    def test_get_feature_data_returns_float32(self):
+        sync = make_sync_data()
+        sync['features']['rms'] = sync['features']['rms'].astype(np.float64)
+        effect = TextOverlayEffect("hi").set_audio_feature('rms')
+        self.assertEqual(effect.get_feature_data(sync).dtype, np.float32)
+
+    def test_get_feature_data_missing_defaults_to_ones(self):
+        effect = TextOverlayEffect("hi").set_audio_feature('nope.nothing')
+        data = effect.get_feature_data(make_sync_data())
+        self.assertTrue(np.all(data == 1.0))
+
+
+class TestLogoOverlayEffect(unittest.TestCase):
+    """Test the logo overlay filter generation"""
+
+    def test_generate_filter_commands(self):
+        effect = LogoOverlayEffect(LOGO_PATH, position='top-right')
+        effect.set_audio_feature('rms').set_scale_range(0.8, 1.2)
+        filters = effect.generate_filter_commands(make_sync_data())
+        self.assertTrue(any('movie=' in f for f in filters))
+        self.assertTrue(any('overlay=' in f for f in filters))
+        self.assertTrue(os.path.exists(effect.data_file))
+        table = np.loadtxt(effect.data_file)
+        self.assertEqual(table.shape, (30, 4))
+        os.remove(effect.data_file)
+
+    def test_identity_transform_stages_are_elided(self):
+        effect = LogoOverlayEffect(LOGO_PATH, scale=0.5)
+        filters = effect.generate_filter_commands(make_sync_data())
+        self.assertIn('scale=', filters[1])
+        self.assertNotIn('colorchannelmixer', filters[1])
+        os.remove(effect.data_file)
+
+    def test_identity_transform_is_short_circuited(self):
+        effect = LogoOverlayEffect(LOGO_PATH)
+        filters = effect.generate_filter_commands(make_sync_data())
+        self.assertEqual(len(filters), 2)
+        self.assertIn('movie=', filters[0])
+        self.assertIn('overlay=', filters[1])
+        os.remove(effect.data_file)
+
+    def test_missing_logo_raises(self):
+        effect = LogoOverlayEffect('/no/such/logo.png')
+        with self.assertRaises(ValueError):
+            effect.generate_filter_commands(make_sync_data())
+
+    def test_xstack_excludes_transparent_logos(self):
+        # The bundled logo has a transparent background; xstack would
+        # paint it as an opaque rectangle, so overlay must be kept
+        effect = LogoOverlayEffect(LOGO_PATH, position=(10, 10))
+        self.assertFalse(effect.supports_xstack())
+
+    def test_xstack_allows_opaque_logos(self):
+        fd, path = tempfile.mkstemp(suffix='.png')
+        os.close(fd)
+        try:
+            Image.new('RGB', (8, 8), (255, 0, 0)).save(path)
+            effect = LogoOverlayEffect(path, position=(10, 10))
+            self.assertTrue(effect.supports_xstack())
+        finally:
+            os.unlink(path)
+
+    def test_round_trip_dict(self):
+        effect = LogoOverlayEffect(LOGO_PATH, scale=0.5)
+        effect.set_scale_range(0.4, 0.9).enable_rotation(2.0)
+        clone = effect_from_dict(effect.to_dict())
+        self.assertIsInstance(clone, LogoOverlayEffect)
+        self.assertEqual(clone._scale_min, 0.4)
+        self.assertTrue(clone._rotation)
+
+
+class TestTextOverlayEffect(unittest.TestCase):
+    """Test the drawtext filter generation"""
+
+    def test_generate_filter_commands(self):
+        effect = TextOverlayEffect("Hello", position='bottom-center')
+        effect.set_audio_feature('rms').set_opacity_range(0.2, 1.0)
+        effect.enable_background_box()
+        filters = effect.generate_filter_commands(make_sync_data())
+        self.assertEqual(len(filters), 1)
+        self.assertIn("drawtext=text='Hello'", filters[0])
+        self.assertIn("box=1", filters[0])
+        os.remove(effect.data_file)
+
+
+class TestTextEscaping(unittest.TestCase):
+    """Test set-time escaping of filter-sensitive characters"""
+
+    def test_text_is_escaped_at_set_time(self):
+        effect = TextOverlayEffect("a:b'c")
+        filters = effect.generate_filter_commands(make_sync_data())
+        self.assertIn("a\\:b'\\''c", filters[0])
+        os.remove(effect.data_file)
+
+
+class TestEffectChain(unittest.TestCase):
+    """Test chain compilation into FFmpeg arguments"""
+
+    def test_build_ffmpeg_args_inlines_small_graphs(self):
+        chain = EffectChain([TextOverlayEffect("Hello")])
+        args = chain.build_ffmpeg_args(make_sync_data())
+        self.assertEqual(args[0], '-filter_complex')
+        self.assertIn('drawtext', args[1])
+
+    def test_build_ffmpeg_args_uses_script_for_large_graphs(self):
+        chain = EffectChain([TextOverlayEffect("Hello")])
+        with mock.patch.object(effects, '_INLINE_GRAPH_LIMIT', 8):
+            args = chain.build_ffmpeg_args(make_sync_data())
+        self.assertEqual(args[0], '-filter_complex_script')
+        with open(args[1]) as f:
+            self.assertIn('drawtext', f.read())
+        os.remove(args[1])
+
+    def test_compile_shares_feature_arrays(self):
+        first = TextOverlayEffect("a", name='first', order=1)
+        second = TextOverlayEffect("b", name='second', order=2)
+        first.set_audio_feature('rms')
+        second.set_audio_feature('rms')
+        chain = EffectChain([first, second])
+        sync = make_sync_data()
+        args = chain.compile(sync)
+        self.assertEqual(args[0], '-filter_complex')
+        self.assertIs(first._last_data, second._last_data)
+
+    def test_compile_sendcmd_collapses_static_runs(self):
+        # No bound feature means every per-frame parameter is constant,
+        # so the whole clip compresses to one command line
+        chain = EffectChain([TextOverlayEffect("Hello")])
+        path = chain.compile_sendcmd(make_sync_data())
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        os.remove(path)
+
+    def test_build_filters_chains_effects_with_short_labels(self):
+        chain = EffectChain([
+            TextOverlayEffect("a", name='first', order=1),
+            TextOverlayEffect("b", name='second', order=2),
+        ])
+        filters = chain.build_filters(make_sync_data())
+        self.assertEqual(len(filters), 2)
+        self.assertTrue(filters[0].startswith('[main]'))
+        self.assertTrue(filters[0].endswith('[x0]'))
+        self.assertTrue(filters[1].startswith('[x0]'))
+        self.assertTrue(filters[1].endswith('[out]'))
+
+    def test_build_filters_collapses_numeric_overlays_to_xstack(self):
+        chain = EffectChain([
+            SpectrumVisualizerEffect(position=(i * 100, 0), name=f's{i}', order=i)
+            for i in range(3)
+        ])
+        filters = chain.build_filters(make_sync_data())
+        self.assertIn('xstack=inputs=4', filters[-1])
+        self.assertIn('layout=0_0|0_0|100_0|200_0', filters[-1])
+        self.assertTrue(filters[-1].endswith('[out]'))
+        self.assertFalse(any('overlay=' in f for f in filters))
+
+    def test_build_filters_keeps_overlay_chain_for_expression_positions(self):
+        chain = EffectChain([
+            SpectrumVisualizerEffect(position='bottom-center', name=f's{i}', order=i)
+            for i in range(3)
+        ])
+        filters = chain.build_filters(make_sync_data())
+        self.assertFalse(any('xstack' in f for f in filters))
+        self.assertTrue(any('overlay=' in f for f in filters))
+
+    def test_build_filtergraph_joins_fragments(self):
+        graph = effects.build_filtergraph(
+            [TextOverlayEffect("a"), TextOverlayEffect("b")],
+            make_sync_data(),
+        )
+        self.assertEqual(graph.count('drawtext'), 2)
+        self.assertEqual(graph.count(';'), 1)
+
+    def test_write_filter_script_joins_filters(self):
+        path = write_filter_script(['[a]null[b]', '[b]null[c]'])
+        with open(path) as f:
+            self.assertEqual(f.read(), '[a]null[b];[b]null[c]')
+        os.remove(path)
+
+
+class TestRegistry(unittest.TestCase):
+    """Test effect creation through the registry"""
+
+    def test_create_effect(self):
+        effect = create_effect('SpectrumVisualizerEffect', width=320, height=60)
+        self.assertIsInstance(effect, SpectrumVisualizerEffect)
+
+    def test_unknown_type_raises(self):
+        with self.assertRaises(ValueError):
+            create_effect('NopeEffect')
+
+
+if __name__ == '__main__':
+    unittest.main()
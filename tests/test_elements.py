@@ -0,0 +1,55 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+from moviepy.video.VideoClip import ColorClip, ImageClip
+from audiovisualizer.elements import Element, ElementManager, LogoElement
+
+class TestElementManager(unittest.TestCase):
+    """Test element management and rendering"""
+
+    def test_render_all_two_elements(self):
+        """Two elements render through the thread pool without hanging"""
+        manager = ElementManager()
+        manager.set_base_video(
+            ColorClip(size=(64, 48), color=(0, 0, 0), duration=1.0).with_fps(10)
+        )
+        frame = np.zeros((8, 8, 3), dtype=np.uint8)
+        manager.add_element(Element(ImageClip(frame), (0, 0)))
+        manager.add_element(Element(ImageClip(frame), (10, 10)))
+
+        clips = manager.render_all()
+
+        # One static clip per element, in layering order
+        self.assertEqual(len(clips), 2)
+        for clip in clips:
+            self.assertAlmostEqual(clip.duration, 1.0)
+
+class TestReactiveRender(unittest.TestCase):
+    """Test the reactive element rendering path"""
+
+    def setUp(self):
+        fd, self.logo_path = tempfile.mkstemp(suffix='.png')
+        os.close(fd)
+        Image.new('RGBA', (16, 16), (255, 0, 0, 255)).save(self.logo_path)
+
+    def tearDown(self):
+        os.unlink(self.logo_path)
+
+    def test_reactive_render_covers_duration(self):
+        """A scale reaction yields multiple clips spanning the video"""
+        element = LogoElement(self.logo_path, (0, 0))
+        element.set_audio_features({'rms': np.linspace(0.0, 1.0, 10)})
+        element.add_reaction('scale', 'rms',
+                             {'min_scale': 1.0, 'max_scale': 1.5})
+
+        clips = element.render(10, 1.0)
+
+        # The ramping feature forces more than one coalesced run, and
+        # the runs tile the full duration
+        self.assertGreater(len(clips), 1)
+        self.assertAlmostEqual(sum(c.duration for c in clips), 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
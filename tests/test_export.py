@@ -0,0 +1,32 @@
+import unittest
+import os
+import tempfile
+from moviepy.video.VideoClip import ColorClip
+from moviepy.video.io.VideoFileClip import VideoFileClip
+from audiovisualizer.export import VideoExporter
+
+class TestVideoExporter(unittest.TestCase):
+    """Test the export pipeline against a real encode"""
+
+    def test_export_round_trip(self):
+        """export() writes a file that decodes back at the same size"""
+        exporter = VideoExporter()
+        exporter.set_video(
+            ColorClip(size=(64, 48), color=(200, 30, 30), duration=0.5).with_fps(10)
+        )
+        output_path = os.path.join(tempfile.mkdtemp(), 'out.mp4')
+        try:
+            exporter.export(output_path)
+
+            self.assertTrue(os.path.isfile(output_path))
+            self.assertGreater(os.path.getsize(output_path), 0)
+            with VideoFileClip(output_path) as clip:
+                self.assertEqual(tuple(clip.size), (64, 48))
+                self.assertAlmostEqual(clip.duration, 0.5, delta=0.2)
+        finally:
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+            os.rmdir(os.path.dirname(output_path))
+
+if __name__ == '__main__':
+    unittest.main()